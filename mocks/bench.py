@@ -0,0 +1,483 @@
+"""In-process benchmarks for the mock API (no network, ASGI transport).
+
+Usage:
+    python bench.py suite --users 20 --projects-per-user 3 --output bench.json
+    python bench.py suite --only dashboard --cache cold
+    python bench.py login --users 200 --requests 2000 --concurrency 32
+    python bench.py login --scheme pbkdf2_sha256 --iterations 200000 --workers 8
+    python bench.py serialize --items 500 --requests 200
+    python bench.py ingest --rate 5000 --batch 200 --duration 10 --readers 8
+    python bench.py memory --rows 50000
+
+Hashing settings map onto the MOCK_PASSWORD_* environment variables read by
+main.py, so they are applied before the app is imported.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASE_URL = "http://mock"
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def timed_calls(make_call, total, concurrency):
+    """Run ``make_call(i)`` ``total`` times with at most ``concurrency`` in flight."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_call(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def summarize(name, latencies, elapsed, **extra):
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        **extra,
+    }
+
+
+async def bench_login(args):
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+        emails = [f"bench-{i}@example.com" for i in range(args.users)]
+        await timed_calls(
+            lambda i: client.post("/api/auth/signup", json={
+                "email": emails[i], "password": "bench-password", "fullName": None,
+            }),
+            args.users,
+            args.concurrency,
+        )
+        latencies, elapsed = await timed_calls(
+            lambda i: client.post("/api/auth/login", json={
+                "email": emails[i % args.users], "password": "bench-password",
+            }),
+            args.requests,
+            args.concurrency,
+        )
+    hasher = main.password_hasher
+    return summarize(
+        "login", latencies, elapsed,
+        concurrency=args.concurrency,
+        scheme=hasher.scheme,
+        params=list(hasher.params),
+        workers=hasher.workers,
+    )
+
+
+async def bench_serialize(args):
+    """Requests/sec per endpoint with MOCK_JSON_MODE=default vs fast."""
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+        signup = await client.post("/api/auth/signup", json={
+            "email": "bench-serialize@example.com", "password": "bench-password", "fullName": None,
+        })
+        headers = {"Authorization": f"Bearer {signup.json()['token']}"}
+        for i in range(args.projects):
+            created = await client.post("/api/context/all", headers=headers, json={
+                "brandInfo": {"name": f"Brand {i}"},
+                "personas": [{"id": n, "name": f"Persona {n}", "description": "bench"} for n in range(args.items)],
+                "competitors": [{"name": f"Competitor {n}", "websites": f"c{n}.example.com"} for n in range(args.items)],
+                "topics": [{"id": n, "name": f"Topic {n}"} for n in range(args.items)],
+            })
+            project_id = created.json()["projectId"]
+        csv_body = "text,tags\n" + "".join(f"Prompt number {n},bench\n" for n in range(args.items))
+        await client.post("/api/Prompt/bulk-upload", headers=headers,
+                          data={"ContextId": project_id}, files={"file": ("prompts.csv", csv_body)})
+
+        endpoints = [
+            f"/api/context/personas/{project_id}",
+            f"/api/context/competitors/{project_id}",
+            f"/api/context/topics/{project_id}",
+            f"/api/prompt/{project_id}",
+            "/api/context/brands",
+            "/api/projects/my",
+        ]
+        results = []
+        for path in endpoints:
+            row = {"endpoint": path.replace(project_id, "{projectId}")}
+            for mode in ("default", "fast"):
+                main.JSON_MODE = mode
+                latencies, elapsed = await timed_calls(
+                    lambda i: client.get(path, headers=headers), args.requests, args.concurrency,
+                )
+                row[f"{mode}_rps"] = summarize(path, latencies, elapsed)["rps"]
+            row["speedup"] = round(row["fast_rps"] / row["default_rps"], 2)
+            results.append(row)
+    return results
+
+
+async def seed_accounts(client, users, projects_per_user, items):
+    """Sign up ``users`` accounts, each with ``projects_per_user`` projects.
+
+    Returns one (headers, projectId) pair per project.
+    """
+    accounts = []
+    for u in range(users):
+        signup = await client.post("/api/auth/signup", json={
+            "email": f"suite-{u}@example.com", "password": "bench-password", "fullName": f"User {u}",
+        })
+        headers = {"Authorization": f"Bearer {signup.json()['token']}"}
+        for p in range(projects_per_user):
+            created = await client.post("/api/context/all", headers=headers, json={
+                "brandInfo": {"name": f"Brand {u}-{p}", "websites": f"brand{u}-{p}.example.com"},
+                "personas": [{"id": n, "name": f"Persona {n}"} for n in range(items)],
+                "competitors": [{"name": f"Competitor {n}"} for n in range(min(items, 8))],
+                "topics": [{"id": n, "name": f"Topic {n}"} for n in range(items)],
+            })
+            accounts.append((headers, created.json()["projectId"]))
+    return accounts
+
+
+async def bench_suite(args):
+    """Throughput and p50/p95/p99 for every route group.
+
+    Routes served through the response cache are timed twice: "cold" with the
+    cache disabled, so every request builds its payload, and "warm" after one
+    untimed request per project has filled it.
+    """
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+        accounts = await seed_accounts(client, args.users, args.projects_per_user, args.items)
+        total = len(accounts)
+        scale = args.observations
+        page = args.page_size
+        new_ids = iter(range(1_000_000, 2_000_000))
+        deletable = []
+
+        def account(i):
+            return accounts[i % total]
+
+        async def add_persona(i):
+            headers, project_id = account(i)
+            persona_id = next(new_ids)
+            return await client.post(f"/api/context/personas/{project_id}", headers=headers,
+                                     json={"id": persona_id, "name": f"Added {persona_id}"})
+
+        async def seed_deletes():
+            # untimed: the personas the delete route removes, one per request
+            deletable[:] = [next(new_ids) for _ in range(args.requests)]
+            await timed_calls(
+                lambda i: client.post(f"/api/context/personas/{account(i)[1]}", headers=account(i)[0],
+                                      json={"id": deletable[i], "name": f"Doomed {deletable[i]}"}),
+                args.requests, args.concurrency,
+            )
+
+        async def seed_logins():
+            # untimed: login-only accounts, so the per-user session cap evicts
+            # their tokens and never the seeded bearer tokens the other routes use
+            await timed_calls(
+                lambda i: client.post("/api/auth/signup", json={
+                    "email": f"suite-login-{i}@example.com", "password": "bench-password", "fullName": None,
+                }),
+                args.users, args.concurrency,
+            )
+
+        async def delete_persona(i):
+            headers, project_id = account(i)
+            return await client.delete(f"/api/context/personas/{project_id}/{deletable[i]}", headers=headers)
+
+        def get(path_for, params=None):
+            async def call(i):
+                headers, project_id = account(i)
+                return await client.get(path_for(project_id), headers=headers, params=params)
+            return call
+
+        routes = [
+            ("auth.login", lambda i: client.post("/api/auth/login", json={
+                "email": f"suite-login-{i % args.users}@example.com", "password": "bench-password",
+            })),
+            ("context.brands", get(lambda pid: "/api/context/brands")),
+            ("context.personas.get", get(lambda pid: f"/api/context/personas/{pid}")),
+            ("context.personas.add", add_persona),
+            ("context.personas.patch", lambda i: client.patch(
+                f"/api/context/personas/{account(i)[1]}/0", headers=account(i)[0], json={"description": f"v{i}"},
+            )),
+            ("context.personas.delete", delete_persona),
+            ("dashboard.overview", get(lambda pid: f"/api/dashboard-overview/{pid}")),
+            ("dashboard.competitor-presence", get(lambda pid: f"/api/competitor-presence/{pid}")),
+            ("dashboard.position", get(lambda pid: f"/api/position/{pid}", {"granularity": "week"})),
+            ("dashboard.presence", get(lambda pid: f"/api/presence/{pid}")),
+            ("dashboard.citations", get(lambda pid: f"/api/citations/{pid}")),
+            ("dashboard.batch", lambda i: client.post(f"/api/dashboard/{account(i)[1]}", headers=account(i)[0], json={
+                "panels": [{"panel": name} for name in main.DASHBOARD_PANELS],
+            })),
+            ("observations.page", lambda i: client.get("/api/prompt-observations", headers=account(i)[0], params={
+                "scale": scale, "limit": page, "offset": (i * page) % scale,
+            })),
+            ("prompt-competitor-perf", get(lambda pid: f"/api/{pid}/prompt-competitor-perf", {"scale": scale, "top": 5})),
+        ]
+        cached = {name for name, _ in routes if name.startswith("dashboard.")} | {"prompt-competitor-perf"}
+        setups = {"auth.login": seed_logins, "context.personas.delete": seed_deletes}
+        ttl = main.response_cache.ttl
+        passes = ["cold", "warm"] if args.cache == "both" else [args.cache]
+        if not ttl:  # MOCK_RESPONSE_CACHE_TTL=0: nothing is ever warm
+            passes = ["cold"]
+        results = []
+        for name, make_call in routes:
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            if name in setups:
+                await setups[name]()
+            if name not in cached:
+                latencies, elapsed = await timed_calls(make_call, args.requests, args.concurrency)
+                results.append(summarize(name, latencies, elapsed))
+                continue
+            for cache in passes:
+                main.response_cache.ttl = ttl if cache == "warm" else 0
+                if cache == "warm":
+                    await timed_calls(make_call, total, args.concurrency)
+                latencies, elapsed = await timed_calls(make_call, args.requests, args.concurrency)
+                results.append(summarize(name, latencies, elapsed, cache=cache))
+            main.response_cache.ttl = ttl
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "storage": main.STORAGE_BACKEND,
+            "json_mode": main.JSON_MODE,
+            "json_encoder": "orjson" if main.JSON_MODE == "fast" and main.orjson is not None else "json",
+            "users": args.users,
+            "projects": total,
+            "items": args.items,
+            "observations": scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache_ttl": ttl,
+        },
+        "routes": results,
+    }
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    return results
+
+
+async def bench_ingest(args):
+    """Replay observations at ``--rate`` records/s while readers poll the dashboards."""
+    import random
+
+    import main
+
+    rng = random.Random(0)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+        headers, project_id = (await seed_accounts(client, 1, 1, 10))[0]
+        prompt_ids = list(main.get_prompt_index(project_id).ids)
+        competitors = [f"Competitor {n}" for n in range(8)]
+        sources = main.THIRD_PARTY_DOMAINS + [f"brand0-0.example.com", "competitor1.com"]
+
+        def record():
+            return {
+                "promptId": rng.choice(prompt_ids),
+                "platform": rng.choice(main.SERIES_PLATFORMS),
+                "brandPosition": rng.choice([None, 1, 2, 3, 4, 6]),
+                "competitors": rng.sample(competitors, rng.randint(0, 3)),
+                "sources": [f"https://{host}/page" for host in rng.sample(sources, rng.randint(1, 4))],
+            }
+
+        reads = [
+            f"/api/presence/{project_id}",
+            f"/api/position/{project_id}",
+            f"/api/citations/{project_id}",
+            f"/api/competitor-presence/{project_id}",
+            f"/api/Citation/context/{project_id}/dashboard/domain",
+            f"/api/Citation/context/{project_id}/stats",
+            f"/api/{project_id}/prompt-competitor-perf",
+        ]
+        write_latencies, read_latencies = [], {path: [] for path in reads}
+        deadline = time.perf_counter() + args.duration
+        interval = args.batch / args.rate
+        written = 0
+
+        async def writer():
+            nonlocal written
+            next_at = time.perf_counter()
+            while next_at < deadline:
+                batch = [record() for _ in range(args.batch)]
+                started = time.perf_counter()
+                response = await client.post(f"/api/observations/ingest/{project_id}", headers=headers, json=batch)
+                write_latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"ingest -> {response.status_code}: {response.text}")
+                written += args.batch
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+        async def reader(n):
+            i = n
+            while time.perf_counter() < deadline:
+                path = reads[i % len(reads)]
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                read_latencies[path].append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{path} -> {response.status_code}: {response.text}")
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(writer(), *(reader(n) for n in range(args.readers)))
+        elapsed = time.perf_counter() - started
+
+    results = [summarize("ingest", write_latencies, elapsed, batch=args.batch,
+                         records_per_s=round(written / elapsed, 1), target_per_s=args.rate)]
+    for path, latencies in read_latencies.items():
+        results.append(summarize(path.replace(project_id, "{projectId}"), latencies, elapsed))
+    return results
+
+
+def bench_memory(args):
+    """Bytes per observation for each catalogue layout, measured with tracemalloc."""
+    import gc
+    import tracemalloc
+
+    import main
+
+    def objects(size):
+        # one pydantic graph per row, as a naive catalogue would hold them
+        return [
+            main.Observation(
+                id=main.OBSERVATION_BASE_ID + n,
+                seed_prompt=main.make_seed_prompt(131000 + n // 2, n // 2),
+                platform=main.observation_platform(n),
+                observation_count=10 + (n // 2) * 5 + n % 2,
+                created_at=main.OBSERVATION_TIMESTAMP,
+                updated_at=main.OBSERVATION_TIMESTAMP,
+            )
+            for n in range(size)
+        ]
+
+    def rows(size):
+        # pre-encoded JSON bytes per row, the previous catalogue layout
+        return tuple(main.ObservationCatalogue(size).rows)
+
+    def columns(size):
+        return main.ObservationCatalogue(size).rows
+
+    layouts = {"objects": objects, "rows": rows, "columns": columns}
+    results = []
+    for name in args.layouts or layouts:
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        built = layouts[name](args.rows)
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        page_started = time.perf_counter()
+        catalogue = main.ObservationCatalogue.from_rows(built) if name != "objects" else None
+        if catalogue is not None:
+            for offset in range(0, args.rows, max(1, args.rows // 100)):
+                catalogue.page_json(offset, 50)
+        results.append({
+            "layout": name,
+            "rows": args.rows,
+            "bytes_per_observation": round(size / args.rows, 1),
+            "peak_mb": round(peak / 2**20, 1),
+            "build_s": round(elapsed, 2),
+            "page_ms": round((time.perf_counter() - page_started) * 10, 3) if catalogue else None,
+        })
+        del built, catalogue
+    return results
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    suite = commands.add_parser("suite", help="every route group; optional JSON report")
+    suite.add_argument("--users", type=int, default=10)
+    suite.add_argument("--projects-per-user", type=int, default=2)
+    suite.add_argument("--items", type=int, default=20, help="personas/topics per project")
+    suite.add_argument("--observations", type=int, default=10_000, help="observation catalogue scale")
+    suite.add_argument("--page-size", type=int, default=50)
+    suite.add_argument("--requests", type=int, default=500, help="requests per route")
+    suite.add_argument("--concurrency", type=int, default=16)
+    suite.add_argument("--only", nargs="*", help="route name prefixes to run, e.g. dashboard auth")
+    suite.add_argument("--cache", choices=["cold", "warm", "both"], default="both",
+                       help="response-cache passes for cached routes (cold: TTL 0)")
+    suite.add_argument("--output", help="write the JSON report here")
+    suite.set_defaults(run=bench_suite)
+
+    login = commands.add_parser("login", help="login p50/p99 at a given concurrency")
+    login.add_argument("--users", type=int, default=100)
+    login.add_argument("--requests", type=int, default=1000)
+    login.add_argument("--concurrency", type=int, default=16)
+    login.add_argument("--scheme", choices=["sha256", "pbkdf2_sha256", "scrypt"])
+    login.add_argument("--iterations", type=int, help="PBKDF2 iterations")
+    login.add_argument("--workers", type=int, help="hashing pool size")
+    login.add_argument("--pool", choices=["thread", "process"])
+    login.set_defaults(run=bench_login)
+
+    serialize = commands.add_parser("serialize", help="requests/sec per endpoint, default vs fast JSON mode")
+    serialize.add_argument("--items", type=int, default=500, help="personas/competitors/topics/prompts per project")
+    serialize.add_argument("--projects", type=int, default=5)
+    serialize.add_argument("--requests", type=int, default=200)
+    serialize.add_argument("--concurrency", type=int, default=8)
+    serialize.set_defaults(run=bench_serialize)
+
+    ingest = commands.add_parser("ingest", help="ingestion rate vs concurrent dashboard read latency")
+    ingest.add_argument("--rate", type=int, default=5000, help="target records/s")
+    ingest.add_argument("--batch", type=int, default=200, help="records per ingest request")
+    ingest.add_argument("--duration", type=float, default=10.0, help="seconds")
+    ingest.add_argument("--readers", type=int, default=8, help="concurrent dashboard readers")
+    ingest.set_defaults(run=bench_ingest)
+
+    memory = commands.add_parser("memory", help="bytes per observation: object graphs vs encoded rows vs columns")
+    memory.add_argument("--rows", type=int, default=50_000)
+    memory.add_argument("--layouts", nargs="*", choices=["objects", "rows", "columns"])
+    memory.set_defaults(run=bench_memory)
+
+    args = parser.parse_args(argv)
+    for flag, env in (("scheme", "MOCK_PASSWORD_SCHEME"), ("iterations", "MOCK_PBKDF2_ITERATIONS"),
+                      ("workers", "MOCK_PASSWORD_WORKERS"), ("pool", "MOCK_PASSWORD_POOL")):
+        value = getattr(args, flag, None)
+        if value is not None:
+            os.environ[env] = str(value)
+
+    result = args.run(args)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    for row in result if isinstance(result, list) else [result]:
+        print(" ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,14 +1,63 @@
-from fastapi import FastAPI, HTTPException, Body, Query, Header, Request, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from fastapi import FastAPI, HTTPException, Body, File, Form, Query, Header, Request, UploadFile, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Optional, List, Dict, Union
 from uuid import uuid4
+import asyncio
+import base64
+import codecs
+import cProfile
+import csv
 import hashlib
-from google.oauth2 import id_token
+import heapq
+import hmac
+import io
+import json
+import mmap
+import os
+import pstats
+import queue
+import random
+import re
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import warnings
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import count
+import requests
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+from google.auth import crypt as google_crypt
+from google.auth import jwt as google_jwt
 from google.auth.transport import requests as google_requests
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(sweep_sessions_forever())
+    for size in PREBUILT_CATALOGUE_SCALES:
+        await observation_catalogue(size)
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +65,788 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition"],
 )
 
+# --- Request metrics ---
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PROFILING = os.environ.get("MOCK_PROFILING", "0") == "1"  # opt-in: honour X-Profile request headers
+PROFILE_DEFAULT_LINES = 30
+
+# Phase timers of the request being served: phase -> seconds
+_request_phases: ContextVar[Optional[dict]] = ContextVar("request_phases", default=None)
+
+@contextmanager
+def timed_phase(name: str):
+    """Add the block's wall time to phase ``name`` of the current request."""
+    phases = _request_phases.get()
+    if phases is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+class Histogram:
+    """Per-bucket counts; rendering makes them cumulative, as Prometheus expects."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class RequestMetrics:
+    """Request counts and latency histograms per route template.
+
+    Phases are auth (token lookup), permission (project check), encode
+    (JSON encoding) and handler (everything else in the request).
+    """
+
+    def __init__(self):
+        self.requests = {}  # (method, route, status) -> count
+        self.latency = {}   # (method, route) -> Histogram
+        self.phases = {}    # (route, phase) -> Histogram
+
+    def record(self, method: str, route: str, status_code: int, elapsed: float, phases: dict):
+        key = (method, route, str(status_code))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self._histogram(self.latency, (method, route)).observe(elapsed)
+        for name, seconds in phases.items():
+            self._histogram(self.phases, (route, name)).observe(seconds)
+
+    @staticmethod
+    def _histogram(table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram()
+        return histogram
+
+    def render(self) -> str:
+        lines = [
+            "# HELP mock_requests_total HTTP requests by route template and status.",
+            "# TYPE mock_requests_total counter",
+        ]
+        for (method, route, code), total in sorted(self.requests.items()):
+            lines.append(
+                f'mock_requests_total{{method="{method}",route="{_label_value(route)}",status="{code}"}} {total}'
+            )
+        self._render_histograms(lines, "mock_request_duration_seconds", "Request latency.",
+                                self.latency, ("method", "route"))
+        self._render_histograms(lines, "mock_request_phase_seconds", "Time per request phase.",
+                                self.phases, ("route", "phase"))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: list, name: str, help_text: str, table: dict, label_names):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for key, histogram in sorted(table.items()):
+            labels = ",".join(f'{label}="{_label_value(value)}"' for label, value in zip(label_names, key))
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+request_metrics = RequestMetrics()
+
+class TimingMiddleware:
+    """Records every HTTP request into ``request_metrics``.
+
+    With MOCK_PROFILING=1, a request sent with ``X-Profile: 1`` (or a line
+    count) is run under cProfile instead, and the response body is replaced by the pstats summary
+    sorted by cumulative time. The original status is kept in
+    X-Profiled-Status. Other requests served meanwhile show up in the profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = PROFILING and dict(scope["headers"]).get(b"x-profile")
+        if profile:
+            return await self._profile(scope, receive, send, profile)
+
+        phases = {}
+        reset = _request_phases.set(phases)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_phases.reset(reset)
+            route = scope.get("route")
+            phases["handler"] = max(elapsed - sum(phases.values()), 0.0)
+            request_metrics.record(
+                scope["method"], route.path if route is not None else "unmatched", status_code, elapsed, phases
+            )
+
+    async def _profile(self, scope, receive, send, header: bytes):
+        if self.profiling:
+            response = Response("Another request is being profiled\n", status_code=409, media_type="text/plain")
+            return await response(scope, receive, send)
+        lines = int(header) if header.isdigit() and int(header) > 1 else PROFILE_DEFAULT_LINES
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        profiler = cProfile.Profile()
+        self.profiling = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profiler.disable()
+            self.profiling = False
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(lines)
+        status_code = next((m["status"] for m in messages if m["type"] == "http.response.start"), 500)
+        response = Response(summary.getvalue(), media_type="text/plain",
+                            headers={"X-Profiled-Status": str(status_code)})
+        await response(scope, receive, send)
+
+app.add_middleware(TimingMiddleware)
+
+@app.get("/metrics")
+async def metrics():
+    sessions = await run_store(session_store.stats)
+    gauges = [
+        "# TYPE mock_sessions_active gauge",
+        f"mock_sessions_active {sessions['activeSessions']}",
+        "# TYPE mock_response_cache_entries gauge",
+        f"mock_response_cache_entries {len(response_cache.entries)}",
+        "# TYPE mock_live_subscribers gauge",
+        f"mock_live_subscribers {sum(len(b.subscribers) for b in live_broadcasters.values())}",
+        "# TYPE mock_live_dropped_total counter",
+        f"mock_live_dropped_total {ProjectBroadcaster.dropped_total}",
+    ]
+    return Response(
+        request_metrics.render() + "\n".join(gauges) + "\n",
+        media_type="text/plain; version=0.0.4",
+    )
+
 # In-memory DB
-users = {}
-tokens = {}
-projects = {}  # projectId -> {"userId":..., ...project/context data...}
+
+# Storage backends share one interface:
+#   users:    get, get_by_email, add, update, all
+#   sessions: create, get, delete, sweep, tokens, stats
+#   projects: new_id, get, add, update, list_for_user, all
+# Records are plain dicts. Callers that mutate a record hand it back through
+# update() so backends that do not share objects (SQLite) persist the change.
+
+class UserStore:
+    """Users indexed by id and by normalized email, so auth lookups are O(1)."""
+
+    def __init__(self):
+        self.users = {}      # userId -> user dict
+        self.by_email = {}   # normalized email -> user dict
+
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        return email.strip().lower()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        return self.users.get(user_id)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        return self.by_email.get(self.normalize_email(email))
+
+    def add(self, user: dict) -> dict:
+        self.users[user["id"]] = user
+        self.by_email[self.normalize_email(user["email"])] = user
+        return user
+
+    def update(self, user: dict) -> dict:
+        return self.add(user)
+
+    def all(self) -> List[dict]:
+        return list(self.users.values())
+
+SESSION_TTL = float(os.environ.get("MOCK_SESSION_TTL", "86400"))  # seconds, refreshed on use
+SESSION_MAX_PER_USER = int(os.environ.get("MOCK_SESSION_MAX_PER_USER", "20"))
+SESSION_SWEEP_INTERVAL = float(os.environ.get("MOCK_SESSION_SWEEP_INTERVAL", "30"))
+
+class SessionStore:
+    """Session tokens with sliding expiry and a per-user cap.
+
+    Every use pushes a session's deadline out by ``ttl``. Deadlines sit in a
+    min-heap that is only appended to on creation; the sweeper pops due
+    entries and re-queues those that were refreshed meanwhile, so a request
+    never pays for heap maintenance. Each user keeps at most ``max_per_user``
+    sessions; the least recently used one is evicted first.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_per_user: int = SESSION_MAX_PER_USER):
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self.sessions = {}      # token -> [userId, expires_at]
+        self.by_user = {}       # userId -> OrderedDict(token -> None), LRU first
+        self.deadlines = []     # heap of (expires_at, token); may hold stale entries
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self, user_id: str) -> str:
+        token = str(uuid4())
+        expires_at = time.monotonic() + self.ttl
+        self.sessions[token] = [user_id, expires_at]
+        heapq.heappush(self.deadlines, (expires_at, token))
+        if len(self.deadlines) > 2 * len(self.sessions) + 1024:
+            # logouts and evictions leave stale entries; rebuild in O(n), amortized
+            self.deadlines = [(expires, t) for t, (_, expires) in self.sessions.items()]
+            heapq.heapify(self.deadlines)
+        user_tokens = self.by_user.setdefault(user_id, OrderedDict())
+        user_tokens[token] = None
+        while len(user_tokens) > self.max_per_user:
+            oldest, _ = user_tokens.popitem(last=False)
+            self.sessions.pop(oldest, None)
+            self.evicted += 1
+        return token
+
+    def get(self, token: str) -> Optional[str]:
+        session = self.sessions.get(token)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if session[1] <= now:
+            self.delete(token)
+            self.expired += 1
+            return None
+        session[1] = now + self.ttl
+        self.by_user[session[0]].move_to_end(token)
+        return session[0]
+
+    def delete(self, token: str) -> bool:
+        session = self.sessions.pop(token, None)
+        if session is None:
+            return False
+        user_tokens = self.by_user.get(session[0])
+        if user_tokens is not None:
+            user_tokens.pop(token, None)
+            if not user_tokens:
+                del self.by_user[session[0]]
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every session whose deadline has passed; returns how many."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, token = heapq.heappop(self.deadlines)
+            session = self.sessions.get(token)
+            if session is None:
+                continue  # logged out or evicted already
+            if session[1] > now:
+                heapq.heappush(self.deadlines, (session[1], token))
+            else:
+                self.delete(token)
+                removed += 1
+        self.expired += removed
+        return removed
+
+    def tokens(self) -> List[str]:
+        return list(self.sessions)
+
+    def stats(self) -> dict:
+        return {
+            "activeSessions": len(self.sessions),
+            "usersWithSessions": len(self.by_user),
+            "pendingDeadlines": len(self.deadlines),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttlSeconds": self.ttl,
+            "maxPerUser": self.max_per_user,
+        }
+
+async def sweep_sessions_forever(interval: float = SESSION_SWEEP_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        await run_store(session_store.sweep)
+
+class ProjectStore:
+    """Projects plus a userId -> projectIds index for the brand switcher."""
+
+    def __init__(self):
+        self.projects = {}   # projectId -> {"userId":..., ...project/context data...}
+        self.by_user = {}    # userId -> [projectId, ...] in creation order
+
+    def get(self, project_id: str) -> Optional[dict]:
+        return self.projects.get(project_id)
+
+    def add(self, project: dict) -> dict:
+        self.projects[project["id"]] = project
+        self.by_user.setdefault(project["userId"], []).append(project["id"])
+        return project
+
+    def new_id(self, user_id: str) -> str:
+        return str(uuid4())
+
+    def update(self, project: dict) -> dict:
+        self.projects[project["id"]] = project
+        return project
+
+    def all(self) -> Dict[str, dict]:
+        return self.projects
+
+    def list_for_user(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        """Return (projects, next_cursor); the cursor is an opaque position in the user's list."""
+        ids = self.by_user.get(user_id, [])
+        start = _parse_cursor(cursor)
+        if start > len(ids):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        end = start + limit if limit else len(ids)
+        page = [self.projects[pid] for pid in ids[start:end]]
+        next_cursor = str(end) if end < len(ids) else None
+        return page, next_cursor
+
+def _parse_cursor(cursor: Optional[str]) -> int:
+    try:
+        position = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if position < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+# --- SQLite backend ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users(email);
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_user ON sessions(user_id, last_used);
+CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions(expires_at);
+CREATE TABLE IF NOT EXISTS projects (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS projects_user ON projects(user_id, seq);
+CREATE TABLE IF NOT EXISTS user_emails (
+    email TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS project_homes (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL
+);
+"""
+SQLITE_POOL_SIZE = int(os.environ.get("MOCK_SQLITE_POOL_SIZE", "8"))
+# Only write a refreshed session deadline once it has drifted this far,
+# so sliding expiry doesn't turn every authenticated read into a write.
+SESSION_REFRESH_GRANULARITY = 60.0
+
+class SqlitePool:
+    """Fixed-size pool of WAL-mode connections shared by the SQLite stores.
+
+    Statements are constant SQL with bound parameters, so each connection's
+    statement cache keeps them prepared across requests.
+    """
+
+    def __init__(self, path: str, size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+            if "version" not in columns:  # databases created before optimistic updates
+                conn.execute("ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, cached_statements=128)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; the block runs as one transaction."""
+        conn = self.idle.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.idle.put(conn)
+
+class SqliteUserStore:
+    def __init__(self, pool: SqlitePool):
+        self.pool = pool
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT data FROM users WHERE id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT data FROM users WHERE email = ?", (UserStore.normalize_email(email),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, user: dict) -> dict:
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (id, email, data) VALUES (?, ?, ?)",
+                    (user["id"], UserStore.normalize_email(user["email"]), json.dumps(user)),
+                )
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        return user
+
+    def update(self, user: dict) -> dict:
+        with self.pool.connection() as conn:
+            conn.execute("UPDATE users SET data = ? WHERE id = ?", (json.dumps(user), user["id"]))
+        return user
+
+    def all(self) -> List[dict]:
+        with self.pool.connection() as conn:
+            return [json.loads(row[0]) for row in conn.execute("SELECT data FROM users")]
+
+class SqliteSessionStore:
+    """Same contract as SessionStore, on wall-clock deadlines shared by all workers."""
+
+    def __init__(self, pool: SqlitePool, ttl: float = SESSION_TTL, max_per_user: int = SESSION_MAX_PER_USER):
+        self.pool = pool
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self.evicted = 0
+        self.expired = 0
+
+    def create(self, user_id: str, token: Optional[str] = None) -> str:
+        token = token or str(uuid4())
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (token, user_id, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (token, user_id, now + self.ttl, now),
+            )
+            evicted = conn.execute(
+                "DELETE FROM sessions WHERE token IN ("
+                " SELECT token FROM sessions WHERE user_id = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (user_id, self.max_per_user),
+            ).rowcount
+        self.evicted += evicted
+        return token
+
+    def get(self, token: str) -> Optional[str]:
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT user_id, expires_at FROM sessions WHERE token = ?", (token,)
+            ).fetchone()
+            if row is None:
+                return None
+            user_id, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+                self.expired += 1
+                return None
+            if now + self.ttl - expires_at >= SESSION_REFRESH_GRANULARITY:
+                conn.execute(
+                    "UPDATE sessions SET expires_at = ?, last_used = ? WHERE token = ?",
+                    (now + self.ttl, now, token),
+                )
+        return user_id
+
+    def delete(self, token: str) -> bool:
+        with self.pool.connection() as conn:
+            return conn.execute("DELETE FROM sessions WHERE token = ?", (token,)).rowcount > 0
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        with self.pool.connection() as conn:
+            removed = conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time() if now is None else now,)
+            ).rowcount
+        self.expired += removed
+        return removed
+
+    def tokens(self) -> List[str]:
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT token FROM sessions")]
+
+    def stats(self) -> dict:
+        with self.pool.connection() as conn:
+            active, users = conn.execute("SELECT COUNT(*), COUNT(DISTINCT user_id) FROM sessions").fetchone()
+        return {
+            "activeSessions": active,
+            "usersWithSessions": users,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttlSeconds": self.ttl,
+            "maxPerUser": self.max_per_user,
+        }
+
+class SqliteProjectStore:
+    """Projects as JSON documents; cursors are the last seen row sequence.
+
+    ``get`` stamps the row version on the project and ``update`` only writes
+    if it is unchanged, so concurrent read-modify-writes from several
+    workers fail with 409 instead of silently dropping one of the edits.
+    """
+
+    def __init__(self, pool: SqlitePool):
+        self.pool = pool
+
+    def get(self, project_id: str) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT data, version FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if row is None:
+            return None
+        project = json.loads(row[0])
+        project["version"] = row[1]
+        return project
+
+    def add(self, project: dict) -> dict:
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO projects (id, user_id, data) VALUES (?, ?, ?)",
+                (project["id"], project["userId"], json.dumps({k: v for k, v in project.items() if k != "version"})),
+            )
+        return project
+
+    def new_id(self, user_id: str) -> str:
+        return str(uuid4())
+
+    def update(self, project: dict) -> dict:
+        version = project.get("version", 0)
+        data = json.dumps({key: value for key, value in project.items() if key != "version"})
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE projects SET data = ?, version = version + 1 WHERE id = ? AND version = ?",
+                (data, project["id"], version),
+            )
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=409, detail="Project was modified concurrently; reload and retry")
+        project["version"] = version + 1
+        return project
+
+    def list_for_user(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        after = _parse_cursor(cursor)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, data FROM projects WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (user_id, after, limit + 1 if limit else -1),
+            ).fetchall()
+        more = bool(limit) and len(rows) > limit
+        rows = rows[:limit] if limit else rows
+        return [json.loads(data) for _, data in rows], (str(rows[-1][0]) if more else None)
+
+    def all(self) -> Dict[str, dict]:
+        with self.pool.connection() as conn:
+            return {pid: json.loads(data) for pid, data in conn.execute("SELECT id, data FROM projects")}
+
+# --- Sharded backend ---
+
+# Shards are WAL-mode SQLite files. Under /dev/shm they live in RAM, and the
+# WAL index is shared memory between processes, so every uvicorn worker
+# reads and writes the same partitions.
+SHARD_COUNT = int(os.environ.get("MOCK_SHARDS", str(os.cpu_count() or 4)))
+SHARD_DIR = os.environ.get(
+    "MOCK_SHARD_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "visibility-mock"),
+)
+SHARD_POOL_SIZE = int(os.environ.get("MOCK_SHARD_POOL_SIZE", "2"))
+
+class ShardMap:
+    """Stable key -> shard mapping (crc32, identical in every process)."""
+
+    def __init__(self, count: int):
+        self.count = count
+
+    def of(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self.count
+
+    def colocated_id(self, owner: str) -> str:
+        """A fresh uuid that hashes to ``owner``'s shard (about ``count`` draws).
+
+        Sessions and projects get ids like this, so a user's rows share one
+        shard and are still found from their own id alone.
+        """
+        target = self.of(owner)
+        while True:
+            candidate = str(uuid4())
+            if self.of(candidate) == target:
+                return candidate
+
+class ShardedUserStore:
+    """Users partitioned by userId, with an email -> userId directory
+    partitioned by email, so login is two point lookups."""
+
+    def __init__(self, shards: ShardMap, pools: List[SqlitePool]):
+        self.shards = shards
+        self.pools = pools
+        self.stores = [SqliteUserStore(pool) for pool in pools]
+
+    def get(self, user_id: str) -> Optional[dict]:
+        return self.stores[self.shards.of(user_id)].get(user_id)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        email = UserStore.normalize_email(email)
+        with self.pools[self.shards.of(email)].connection() as conn:
+            row = conn.execute("SELECT user_id FROM user_emails WHERE email = ?", (email,)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def add(self, user: dict) -> dict:
+        email = UserStore.normalize_email(user["email"])
+        try:
+            with self.pools[self.shards.of(email)].connection() as conn:
+                conn.execute("INSERT INTO user_emails (email, user_id) VALUES (?, ?)", (email, user["id"]))
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        return self.stores[self.shards.of(user["id"])].add(user)
+
+    def update(self, user: dict) -> dict:
+        return self.stores[self.shards.of(user["id"])].update(user)
+
+    def all(self) -> List[dict]:
+        return [user for store in self.stores for user in store.all()]
+
+class ShardedSessionStore:
+    """Sessions on their user's shard; tokens are co-located ids, so the
+    per-user cap is a single-shard query and lookups route by token."""
+
+    def __init__(self, shards: ShardMap, pools: List[SqlitePool]):
+        self.shards = shards
+        self.stores = [SqliteSessionStore(pool) for pool in pools]
+
+    def create(self, user_id: str) -> str:
+        token = self.shards.colocated_id(user_id)
+        return self.stores[self.shards.of(user_id)].create(user_id, token)
+
+    def get(self, token: str) -> Optional[str]:
+        return self.stores[self.shards.of(token)].get(token)
+
+    def delete(self, token: str) -> bool:
+        return self.stores[self.shards.of(token)].delete(token)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return sum(store.sweep(now) for store in self.stores)
+
+    def tokens(self) -> List[str]:
+        return [token for store in self.stores for token in store.tokens()]
+
+    def stats(self) -> dict:
+        per_shard = [store.stats() for store in self.stores]
+        totals = {
+            key: sum(stats[key] for stats in per_shard)
+            for key in ("activeSessions", "usersWithSessions", "expired", "evicted")
+        }
+        return {**per_shard[0], **totals, "shards": [stats["activeSessions"] for stats in per_shard]}
+
+class ShardedProjectStore:
+    """Projects on their owner's shard, so the brand switcher reads one shard.
+
+    New projects get co-located ids and are found from their id alone.
+    Projects whose id hashes elsewhere (restored from a snapshot, say) still
+    live on the owner's shard, with a ``project_homes`` row on the id's shard
+    pointing at the owner: one extra point lookup for those only.
+    """
+
+    def __init__(self, shards: ShardMap, pools: List[SqlitePool]):
+        self.shards = shards
+        self.pools = pools
+        self.stores = [SqliteProjectStore(pool) for pool in pools]
+
+    def new_id(self, user_id: str) -> str:
+        return self.shards.colocated_id(user_id)
+
+    def _owner_store(self, user_id: str) -> SqliteProjectStore:
+        return self.stores[self.shards.of(user_id)]
+
+    def get(self, project_id: str) -> Optional[dict]:
+        shard = self.shards.of(project_id)
+        project = self.stores[shard].get(project_id)
+        if project is None:
+            with self.pools[shard].connection() as conn:
+                row = conn.execute("SELECT user_id FROM project_homes WHERE id = ?", (project_id,)).fetchone()
+            if row is not None:
+                project = self._owner_store(row[0]).get(project_id)
+        return project
+
+    def add(self, project: dict) -> dict:
+        shard = self.shards.of(project["id"])
+        if shard != self.shards.of(project["userId"]):
+            with self.pools[shard].connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO project_homes (id, user_id) VALUES (?, ?)",
+                    (project["id"], project["userId"]),
+                )
+        return self._owner_store(project["userId"]).add(project)
+
+    def update(self, project: dict) -> dict:
+        return self._owner_store(project["userId"]).update(project)
+
+    def list_for_user(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        return self.stores[self.shards.of(user_id)].list_for_user(user_id, cursor, limit)
+
+    def all(self) -> Dict[str, dict]:
+        projects = {}
+        for store in self.stores:
+            projects.update(store.all())
+        return projects
+
+STORAGE_BACKEND = os.environ.get("MOCK_STORAGE", "memory")  # "memory", "sqlite" or "sharded"
+SQLITE_PATH = os.environ.get("MOCK_SQLITE_PATH", "mock.db")
+
+def open_storage(backend: str = STORAGE_BACKEND):
+    """Return (user_store, session_store, project_store) for the chosen backend."""
+    if backend == "sqlite":
+        pool = SqlitePool(SQLITE_PATH)
+        return SqliteUserStore(pool), SqliteSessionStore(pool), SqliteProjectStore(pool)
+    if backend == "sharded":
+        os.makedirs(SHARD_DIR, exist_ok=True)
+        shards = ShardMap(SHARD_COUNT)
+        pools = [
+            SqlitePool(os.path.join(SHARD_DIR, f"shard-{i:02d}-of-{SHARD_COUNT:02d}.db"), SHARD_POOL_SIZE)
+            for i in range(SHARD_COUNT)
+        ]
+        return ShardedUserStore(shards, pools), ShardedSessionStore(shards, pools), ShardedProjectStore(shards, pools)
+    if backend != "memory":
+        raise ValueError(f"Unknown MOCK_STORAGE backend: {backend}")
+    return UserStore(), SessionStore(), ProjectStore()
+
+user_store, session_store, project_store = open_storage()
 
 # Models
 
@@ -55,6 +880,7 @@ class Persona(BaseModel):
     countries: str = ""
 
 class Competitor(BaseModel):
+    id: Optional[str] = None  # stored without the key when unset
     name: str
     alternativeNames: str = ""
     websites: str = ""
@@ -63,6 +889,14 @@ class Topic(BaseModel):
     id:int
     name: str
 
+class KeyTopic(BaseModel):
+    topic: str
+
+class ContextPatchOperation(BaseModel):
+    op: str                         # "add", "replace" or "remove"
+    path: str                       # "/personas/{id}", "/topics/-", ...
+    value: Optional[Dict[str, Any]] = None
+
 class ContextData(BaseModel):
     brandInfo: BrandInfo
     personas: List[Persona]
@@ -86,6 +920,17 @@ class CompetitorPresence(BaseModel):
     presence7Days: float
     presence4Weeks: float
     presence12Weeks: float
+    presenceRange: Optional[float] = None          # start-date..end-date, when given
+    presenceWindows: Optional[Dict[str, float]] = None  # extra windows, keyed by days
+
+class DashboardPanelRequest(BaseModel):
+    panel: str                      # "dashboard-overview", "competitor-presence", "position", ...
+    id: Optional[str] = None        # echoed back; defaults to the panel name
+    params: Dict[str, str] = {}     # the panel's GET query parameters
+
+class DashboardBatchRequest(BaseModel):
+    panels: List[DashboardPanelRequest]
+    stream: bool = False
 
 class PositionEntry(BaseModel):
     period: str
@@ -112,102 +957,460 @@ class CitationEntry(BaseModel):
     competitor_percentage: float
     third_party_percentage: float
 
+# --- Password hashing ---
+
+# "sha256" is the original unsalted digest and stays the default so seeding
+# thousands of accounts is cheap; switch to pbkdf2_sha256 or scrypt to
+# exercise a real KDF. Stored hashes using other settings are upgraded on login.
+PASSWORD_SCHEME = os.environ.get("MOCK_PASSWORD_SCHEME", "sha256")
+PBKDF2_ITERATIONS = int(os.environ.get("MOCK_PBKDF2_ITERATIONS", "600000"))
+SCRYPT_N = int(os.environ.get("MOCK_SCRYPT_N", "16384"))
+SCRYPT_R = int(os.environ.get("MOCK_SCRYPT_R", "8"))
+SCRYPT_P = int(os.environ.get("MOCK_SCRYPT_P", "1"))
+PASSWORD_WORKERS = int(os.environ.get("MOCK_PASSWORD_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_POOL = os.environ.get("MOCK_PASSWORD_POOL", "thread")  # "thread" or "process"
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode()
+
+def compute_password_hash(password: str, scheme: str, params: tuple, salt: Optional[bytes] = None) -> str:
+    """Encode a password as ``$scheme$params$salt$digest`` (legacy sha256: bare hex)."""
+    if scheme == "sha256":
+        return hashlib.sha256(password.encode()).hexdigest()
+    salt = salt if salt is not None else os.urandom(16)
+    if scheme == "pbkdf2_sha256":
+        (iterations,) = params
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    elif scheme == "scrypt":
+        n, r, p = params
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20))
+    else:
+        raise ValueError(f"Unknown password scheme: {scheme}")
+    return "$%s$%s$%s$%s" % (scheme, ",".join(map(str, params)), _b64(salt), _b64(digest))
+
+def parse_password_hash(stored: str):
+    """Return (scheme, params, salt) for a stored hash."""
+    if not stored.startswith("$"):
+        return "sha256", (), None
+    _, scheme, params, salt, _ = stored.split("$")
+    return scheme, tuple(int(v) for v in params.split(",")), base64.b64decode(salt)
+
+def check_password_hash(password: str, stored: str) -> bool:
+    scheme, params, salt = parse_password_hash(stored)
+    return hmac.compare_digest(compute_password_hash(password, scheme, params, salt), stored)
+
+class PasswordHasher:
+    """Runs KDF work on a bounded worker pool so the event loop never hashes.
+
+    hashlib's pbkdf2_hmac and scrypt release the GIL, so a thread pool scales
+    across cores; a process pool is available for pure-Python-heavy setups.
+    """
+
+    def __init__(self, scheme: str = PASSWORD_SCHEME, workers: int = PASSWORD_WORKERS, pool: str = PASSWORD_POOL):
+        self.scheme = scheme
+        self.params = {
+            "sha256": (),
+            "pbkdf2_sha256": (PBKDF2_ITERATIONS,),
+            "scrypt": (SCRYPT_N, SCRYPT_R, SCRYPT_P),
+        }[scheme]
+        self.workers = workers
+        executor_cls = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        self.executor = executor_cls(max_workers=workers)
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, compute_password_hash, password, self.scheme, self.params)
+
+    async def verify(self, password: str, stored: Optional[str]) -> bool:
+        if not stored:
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, check_password_hash, password, stored)
+
+    def needs_rehash(self, stored: str) -> bool:
+        scheme, params, _ = parse_password_hash(stored)
+        return (scheme, params) != (self.scheme, self.params)
+
+password_hasher = PasswordHasher()
+
 # --- Auth Helpers ---
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
 
-def make_token(user_id: str) -> str:
-    token = str(uuid4())
-    tokens[token] = user_id
-    return token
+async def run_store(call, *args):
+    """Call a store method without blocking the event loop on SQLite.
+
+    SQLite-backed calls run in the threadpool, so a writer waiting out
+    busy_timeout holds one worker thread (and the pool serves the others
+    concurrently) instead of stalling every request. Memory stores are
+    called inline.
+    """
+    if STORAGE_BACKEND == "memory":
+        return call(*args)
+    return await run_in_threadpool(call, *args)
+
+async def make_token(user_id: str) -> str:
+    return await run_store(session_store.create, user_id)
 
 def get_or_create_google_user(email: str, fullName: Optional[str]):
-    for user in users.values():
-        if user["email"] == email:
-            return user
+    user = user_store.get_by_email(email)
+    if user:
+        return user
     uid = str(uuid4())
-    user = {"id": uid, "email": email, "fullName": fullName}
-    users[uid] = user
-    return user
+    return user_store.add({"id": uid, "email": email, "fullName": fullName})
 
-def get_userid_from_auth_header(authorization: Optional[str]) -> str:
+async def get_userid_from_auth_header(authorization: Optional[str]) -> str:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="No valid Authorization header/token")
     token = authorization[7:]
-    user_id = tokens.get(token)
+    with timed_phase("auth"):
+        user_id = await run_store(session_store.get, token)
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid or expired session token")
     return user_id
 
-def check_project_permission(projectId: str, user_id: str):
-    project = projects.get(projectId)
+async def check_project_permission(projectId: str, user_id: str):
+    with timed_phase("permission"):
+        project = await run_store(project_store.get, projectId)
     if not project or project["userId"] != user_id:
         raise HTTPException(status_code=403, detail="Access denied or unknown project")
     return project
 
+# --- Google ID-token verification ---
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID") or None  # None skips the audience check
+GOOGLE_VERIFIER = os.environ.get("MOCK_GOOGLE_VERIFIER", "google")  # "google" or "local"
+DEFAULT_CERTS_MAX_AGE = 300
+
+def _max_age(headers) -> int:
+    match = re.search(r"max-age=(\d+)", headers.get("cache-control", "") or "")
+    return int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens against a process-wide cert cache.
+
+    One pooled ``requests.Session`` backs every fetch, and certs are reused
+    until the max-age Google sends with them runs out.
+    """
+
+    def __init__(self, certs_url: str = GOOGLE_CERTS_URL, audience: Optional[str] = GOOGLE_CLIENT_ID):
+        self.certs_url = certs_url
+        self.audience = audience
+        self.transport = google_requests.Request(session=requests.Session())
+        self.certs = None
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+
+    def get_certs(self) -> dict:
+        if self.certs is not None and time.monotonic() < self.expires_at:
+            return self.certs
+        with self.lock:
+            if self.certs is None or time.monotonic() >= self.expires_at:
+                response = self.transport(self.certs_url, method="GET")
+                if response.status != 200:
+                    raise ValueError(f"Could not fetch certificates at {self.certs_url}")
+                self.certs = json.loads(response.data.decode("utf-8"))
+                self.expires_at = time.monotonic() + _max_age(response.headers)
+        return self.certs
+
+    def verify(self, token: str) -> dict:
+        claims = google_jwt.decode(token, certs=self.get_certs(), audience=self.audience)
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer")
+        return claims
+
+class LocalTokenVerifier(GoogleTokenVerifier):
+    """Offline stand-in: signs and verifies Google-shaped tokens with a local RSA key.
+
+    The public half is published as JWKS at /api/auth/google/jwks and tokens
+    can be minted at /api/auth/google/test-token, so login can be load-tested
+    without reaching Google.
+    """
+
+    def __init__(self, audience: Optional[str] = GOOGLE_CLIENT_ID):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        super().__init__(audience=audience)
+        self.kid = uuid4().hex
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self.signer = google_crypt.RSASigner.from_string(private_pem, key_id=self.kid)
+        self.certs = {self.kid: public_pem.decode()}
+        self.expires_at = float("inf")  # the local key never rotates, so certs are never fetched
+        numbers = key.public_key().public_numbers()
+        self.jwks = {"keys": [{
+            "kty": "RSA", "alg": "RS256", "use": "sig", "kid": self.kid,
+            "n": _b64url_uint(numbers.n), "e": _b64url_uint(numbers.e),
+        }]}
+
+    def issue(self, email: str, name: Optional[str] = None, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": GOOGLE_ISSUERS[1], "aud": self.audience or "mock-client",
+            "sub": hashlib.sha256(email.encode()).hexdigest()[:21],
+            "email": email, "email_verified": True, "iat": now, "exp": now + ttl,
+        }
+        if name:
+            claims["name"] = name
+        return google_jwt.encode(self.signer, claims).decode()
+
+def _b64url_uint(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+token_verifier = LocalTokenVerifier() if GOOGLE_VERIFIER == "local" else GoogleTokenVerifier()
+
+# --- JSON responses ---
+
+# "fast" (the default) encodes payloads straight to bytes with orjson, and
+# hot handlers hand FastAPI a finished Response. That skips both the
+# jsonable_encoder walk and response_model re-validation of data the handler
+# built from validated models anyway. "default" keeps the stdlib encoder and
+# FastAPI's own serialization, for comparison. Asking for fast mode without
+# orjson installed is an error; the implicit default only warns and encodes
+# with the stdlib.
+JSON_MODE = os.environ.get("MOCK_JSON_MODE", "fast")
+if JSON_MODE not in ("fast", "default"):
+    raise ValueError(f"Unknown MOCK_JSON_MODE: {JSON_MODE}")
+if JSON_MODE == "fast" and orjson is None:
+    if "MOCK_JSON_MODE" in os.environ:
+        raise RuntimeError("MOCK_JSON_MODE=fast needs orjson (pip install orjson)")
+    warnings.warn("orjson is not installed; fast JSON mode falls back to the stdlib encoder", RuntimeWarning)
+
+def _encode_model(obj):
+    # encoder fallback: plain dict/list payloads skip the jsonable_encoder walk
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def _dump_json(payload) -> bytes:
+    with timed_phase("encode"):
+        if orjson is not None and JSON_MODE == "fast":
+            return orjson.dumps(payload, default=_encode_model)
+        return json.dumps(
+            payload, default=_encode_model, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return _dump_json(content)
+
+def json_payload(payload, headers: Optional[Dict[str, str]] = None, response: Optional[Response] = None):
+    """Return a hot handler's payload, pre-encoded in fast mode.
+
+    ``headers`` go on the finished response, or onto the injected
+    ``response`` when FastAPI serializes the payload itself.
+    """
+    if JSON_MODE == "fast":
+        return FastJSONResponse(payload, headers=headers)
+    if headers:
+        response.headers.update(headers)
+    return payload
+
+# --- Response cache ---
+
+RESPONSE_CACHE_TTL = int(os.environ.get("MOCK_RESPONSE_CACHE_TTL", "30"))  # seconds; 0 disables the cache
+RESPONSE_CACHE_MAX_ENTRIES = 2048
+
+class ResponseCache:
+    """Bounded LRU of encoded dashboard payloads with strong ETags.
+
+    Entries are keyed on (projectId, context versions the route depends on,
+    path, normalized query params) and tracked per project, so a context edit
+    drops only the entries built from the sections it touched.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, body, etag)
+        self.by_project = {}          # projectId -> {key, ...}
+
+    @staticmethod
+    def key_for(project: dict, route: str, path: str, params):
+        # Keys carry the versions of the context sections the route reads:
+        # editing anything else leaves the entry valid, and workers that never
+        # saw an edit (so never ran invalidate_project) still miss stale entries
+        depends = CACHE_DEPENDENCIES.get(route, ())
+        versions = project.get("sectionVersions", {})
+        return (project["id"], depends, tuple(versions.get(s, 0) for s in depends), path, tuple(sorted(params)))
+
+    @staticmethod
+    def make_key(request: Request, project: dict):
+        return ResponseCache.key_for(
+            project, request.scope["route"].path, request.url.path, request.query_params.multi_items()
+        )
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, body: bytes, etag: Optional[str] = None):
+        entry = (time.monotonic() + self.ttl, body, etag or body_etag(body))
+        if self.ttl <= 0:
+            return entry
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.by_project.setdefault(key[0], set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+        return entry
+
+    def invalidate_project(self, project_id: str, sections=None):
+        """Drop a project's entries, or with ``sections`` only those built from them."""
+        keys = self.by_project.get(project_id, ())
+        if sections is not None:
+            keys = [key for key in keys if not set(key[1]).isdisjoint(sections)]
+        for key in list(keys):
+            self._drop(key)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        keys = self.by_project.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_project[key[0]]
+
+def body_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+# route -> project context sections its payload is derived from
+CACHE_DEPENDENCIES = {
+    "/api/competitor-presence/{projectId}": ("brandInfo", "competitors"),
+    "/api/{projectId}/prompt-competitor-perf": ("competitors",),
+    "/api/Citation/context/{projectId}/dashboard/{groupBy}": ("brandInfo", "competitors"),
+    "/api/Citation/context/{projectId}/stats": ("brandInfo", "competitors"),
+}
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _cached_json(request: Request, entry) -> Response:
+    _, body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={response_cache.ttl}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cache_lookup(request: Request, project: dict) -> Optional[Response]:
+    """Serve a dashboard response from cache (or a 304) if one is still fresh."""
+    entry = response_cache.get(ResponseCache.make_key(request, project))
+    return _cached_json(request, entry) if entry else None
+
+def cache_store(request: Request, project: dict, payload, etag: Optional[str] = None) -> Response:
+    """Encode a dashboard payload once (``bytes`` are taken as encoded), cache it and return it with its ETag."""
+    body = payload if isinstance(payload, bytes) else _dump_json(payload)
+    entry = response_cache.put(ResponseCache.make_key(request, project), body, etag)
+    return _cached_json(request, entry)
+
 # --- Auth endpoints ---
 
 @app.post("/api/auth/login")
 async def login(payload: LoginPayload = Body(...)):    
     if payload.googleToken:
         try:
-            google_user = id_token.verify_oauth2_token(
-                payload.googleToken,
-                google_requests.Request()
-            )
+            # Signature checks are CPU work and a cert refresh is network I/O;
+            # keep both off the event loop.
+            google_user = await run_in_threadpool(token_verifier.verify, payload.googleToken)
             email = google_user["email"]
             full_name = google_user.get("name", None)
-            user = get_or_create_google_user(email, full_name)
+            user = await run_store(get_or_create_google_user, email, full_name)
             return {
-                "token": make_token(user["id"]),
+                "token": await make_token(user["id"]),
                 "user": user
             }
         except Exception:
             raise HTTPException(status_code=401, detail="Invalid Google token")
 
-    for user in users.values():
-        if user["email"] == payload.email:
-            if user.get("password") == hash_password(payload.password or ""):
-                return {
-                    "token": make_token(user["id"]),
-                    "user": user
-                }
-            break
+    user = await run_store(user_store.get_by_email, payload.email)
+    if user and await password_hasher.verify(payload.password or "", user.get("password")):
+        if password_hasher.needs_rehash(user["password"]):
+            user["password"] = await password_hasher.hash(payload.password or "")
+            await run_store(user_store.update, user)
+        return {
+            "token": await make_token(user["id"]),
+            "user": user
+        }
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.post("/api/auth/signup")
 async def signup(payload: SignupPayload = Body(...)):
-    for user in users.values():
-        if user["email"] == payload.email:
-            raise HTTPException(status_code=400, detail="Email already registered")
+    if await run_store(user_store.get_by_email, payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    password = await password_hasher.hash(payload.password)
+    # another signup may have claimed the email while we were hashing
+    if await run_store(user_store.get_by_email, payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
     uid = str(uuid4())
     user = {
         "id": uid,
         "email": payload.email,
         "fullName": payload.fullName,
-        "password": hash_password(payload.password)
+        "password": password
     }
-    users[uid] = user
+    await run_store(user_store.add, user)
     return {
-        "token": make_token(uid),
+        "token": await make_token(uid),
         "user": user
     }
 
 @app.post("/api/auth/logout")
 async def logout(token: str = Body(...)):
-    if token in tokens:
-        del tokens[token]
+    if await run_store(session_store.delete, token):
         return {"status": "ok"}
     raise HTTPException(status_code=400, detail="Invalid token")
 
 @app.get("/api/auth/users")
 async def list_users():
     return {
-        "users": list(users.values()),
-        "active_sessions": list(tokens.keys()),
+        "users": await run_store(user_store.all),
+        "active_sessions": await run_store(session_store.tokens),
     }
 
+@app.get("/api/auth/sessions/stats")
+async def session_stats():
+    return await run_store(session_store.stats)
+
+class TestTokenPayload(BaseModel):
+    email: str
+    name: Optional[str] = None
+
+def _local_verifier() -> LocalTokenVerifier:
+    if not isinstance(token_verifier, LocalTokenVerifier):
+        raise HTTPException(status_code=404, detail="Local Google verifier is not enabled")
+    return token_verifier
+
+@app.get("/api/auth/google/jwks")
+async def google_jwks():
+    return _local_verifier().jwks
+
+@app.post("/api/auth/google/test-token")
+async def google_test_token(payload: TestTokenPayload = Body(...)):
+    return {"googleToken": _local_verifier().issue(payload.email, payload.name)}
+
 # --- Project & Context APIs ---
 
 @app.post("/api/context/all")
@@ -215,20 +1418,20 @@ async def create_context(
     data: ContextData = Body(...), 
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
+    user_id = await get_userid_from_auth_header(authorization)
     # create new brand/project id
-    project_id = str(uuid4())
+    project_id = await run_store(project_store.new_id, user_id)
     data.brandInfo.id = project_id
     # flatten context for project-centric lookup
     project_obj = {
         "id": project_id,
         "userId": user_id,
         "brandInfo": data.brandInfo.dict(),
-        "personas": [p.dict() for p in data.personas],
-        "competitors": [c.dict() for c in data.competitors],
-        "topics": [t.dict() for t in data.topics]
+        "personas": index_context_items([p.dict() for p in data.personas]),
+        "competitors": index_context_items([c.dict(exclude_none=True) for c in data.competitors]),
+        "topics": index_context_items([t.dict() for t in data.topics]),
     }
-    projects[project_id] = project_obj
+    await run_store(project_store.add, project_obj)
     return {"status": "success", "projectId": project_id, "brandInfo": project_obj["brandInfo"]}
 
 @app.get("/api/context/brand/{projectId}")
@@ -236,121 +1439,625 @@ async def get_brand_info(
     projectId: str, 
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    return project["brandInfo"]
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    return json_payload(project["brandInfo"])
 
 @app.get("/api/context/brands")
 async def get_all_user_brands(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    brand_list = [
-        proj["brandInfo"]
-        for proj in projects.values()
-        if proj["userId"] == user_id
-    ]
-    return brand_list
+    user_id = await get_userid_from_auth_header(authorization)
+    user_projects, next_cursor = await run_store(project_store.list_for_user, user_id, cursor, limit)
+    # body stays a plain list for the frontend; the next page is advertised in a header
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_payload([proj["brandInfo"] for proj in user_projects], headers, response)
 
 @app.post("/api/context/brand")
 async def create_brand_info(
     brandInfo: BrandInfo = Body(...),
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
+    user_id = await get_userid_from_auth_header(authorization)
     # Generate new project id
-    project_id = str(uuid4())
+    project_id = await run_store(project_store.new_id, user_id)
     brandInfo.id = project_id
     # Create project for user, only brand info initially
     project_obj = {
         "id": project_id,
         "userId": user_id,
         "brandInfo": brandInfo.dict(),
-        "personas": [],
-        "competitors": [],
-        "topics": [],
+        "personas": {},
+        "competitors": {},
+        "topics": {},
     }
-    projects[project_id] = project_obj
+    await run_store(project_store.add, project_obj)
     return {
         "status": "success",
         "projectId": project_id,
         "brandInfo": brandInfo.dict()
     }
 
+# Personas, competitors and topics are stored per project as ordered
+# {itemId: item} dicts, so a single-item add, edit or delete is one dict
+# operation however long the list is. The GET routes still return lists.
+CONTEXT_SECTIONS = {"personas": Persona, "competitors": Competitor, "topics": Topic}
+MAX_PATCH_OPERATIONS = 1000
+
+def context_item_id(item: dict) -> str:
+    # competitors saved before they carried ids are keyed by name
+    return str(item["id"] if item.get("id") is not None else item["name"])
+
+def index_context_items(items: List[dict]) -> Dict[str, dict]:
+    return {context_item_id(item): item for item in items}
+
+def context_items(project: dict, section: str) -> Dict[str, dict]:
+    """A context section as its ``{itemId: item}`` dict.
+
+    Sections stored as lists (older records, snapshots) are converted on first use.
+    """
+    items = project[section]
+    if isinstance(items, list):
+        items = project[section] = index_context_items(items)
+    return items
+
+INTERNAL_PROJECT_FIELDS = ("sectionVersions", "version")
+
+def public_project(project: dict) -> dict:
+    """A project record as clients see it: sections as lists, no bookkeeping fields."""
+    public = {key: value for key, value in project.items() if key not in INTERNAL_PROJECT_FIELDS}
+    for section in CONTEXT_SECTIONS:
+        if section in project:
+            public[section] = list(context_items(project, section).values())
+    return public
+
+async def commit_context(project: dict, *sections: str):
+    """Persist a context edit and drop only the cached responses built from ``sections``."""
+    versions = project.setdefault("sectionVersions", {})
+    for section in sections:
+        versions[section] = versions.get(section, 0) + 1
+    await run_store(project_store.update, project)
+    response_cache.invalidate_project(project["id"], sections)
+    publish_project_event(project["id"], "context", {"sections": {s: versions[s] for s in sections}})
+
+def validate_context_item(section: str, value: dict) -> dict:
+    try:
+        return CONTEXT_SECTIONS[section](**value).dict(exclude_none=True)
+    except (TypeError, ValidationError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+async def replace_context_section(projectId: str, section: str, items: List[BaseModel], authorization: Optional[str]):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    project[section] = index_context_items([item.dict(exclude_none=True) for item in items])
+    await commit_context(project, section)
+    return {"status": "success"}
+
+async def upsert_context_item(projectId: str, section: str, item: BaseModel, authorization: Optional[str]):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    data = item.dict(exclude_none=True)
+    # an existing id keeps its position in the list
+    context_items(project, section)[context_item_id(data)] = data
+    await commit_context(project, section)
+    return {"status": "success", "id": context_item_id(data)}
+
+async def patch_context_item(projectId: str, section: str, item_id: str, changes: dict, authorization: Optional[str]):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    items = context_items(project, section)
+    if item_id not in items:
+        raise HTTPException(status_code=404, detail=f"Unknown {section[:-1]}: {item_id}")
+    data = validate_context_item(section, {**items[item_id], **changes})
+    if context_item_id(data) != item_id:
+        raise HTTPException(status_code=400, detail=f"Cannot change the id of {section[:-1]} {item_id}")
+    items[item_id] = data
+    await commit_context(project, section)
+    return data
+
+async def delete_context_item(projectId: str, section: str, item_id: str, authorization: Optional[str]):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if context_items(project, section).pop(item_id, None) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown {section[:-1]}: {item_id}")
+    await commit_context(project, section)
+    return {"status": "success"}
+
 @app.get("/api/context/personas/{projectId}")
 async def get_personas(
     projectId: str,
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    return project["personas"]
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    return json_payload(list(context_items(project, "personas").values()))
 
 @app.post("/api/context/personas/{projectId}")
 async def save_personas(
     projectId: str, 
-    personas: List[Persona] = Body(...), 
+    personas: Union[List[Persona], Persona] = Body(...), 
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    project["personas"] = [p.dict() for p in personas]
-    return {"status": "success"}
+    # a list replaces the section; a single persona is added, or updated by id
+    if isinstance(personas, list):
+        return await replace_context_section(projectId, "personas", personas, authorization)
+    return await upsert_context_item(projectId, "personas", personas, authorization)
+
+@app.patch("/api/context/personas/{projectId}/{personaId}")
+async def update_persona(
+    projectId: str,
+    personaId: str,
+    changes: Dict[str, Any] = Body(...),
+    authorization: Optional[str] = Header(None)
+):
+    return await patch_context_item(projectId, "personas", personaId, changes, authorization)
+
+@app.delete("/api/context/personas/{projectId}/{personaId}")
+async def delete_persona(
+    projectId: str,
+    personaId: str,
+    authorization: Optional[str] = Header(None)
+):
+    return await delete_context_item(projectId, "personas", personaId, authorization)
 
 @app.get("/api/context/competitors/{projectId}")
 async def get_competitors(
     projectId: str,
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    return project["competitors"]
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    return json_payload(list(context_items(project, "competitors").values()))
 
 @app.post("/api/context/competitors/{projectId}")
+@app.post("/api/Context/competitors/{projectId}")
 async def save_competitors(
     projectId: str, 
-    competitors: List[Competitor] = Body(...), 
+    competitors: Union[List[Competitor], Competitor] = Body(...), 
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    project["competitors"] = [c.dict() for c in competitors]
-    return {"status": "success"}
+    if isinstance(competitors, list):
+        return await replace_context_section(projectId, "competitors", competitors, authorization)
+    return await upsert_context_item(projectId, "competitors", competitors, authorization)
+
+@app.patch("/api/context/competitors/{projectId}/{competitorId}")
+async def update_competitor(
+    projectId: str,
+    competitorId: str,
+    changes: Dict[str, Any] = Body(...),
+    authorization: Optional[str] = Header(None)
+):
+    return await patch_context_item(projectId, "competitors", competitorId, changes, authorization)
+
+@app.delete("/api/context/competitors/{projectId}/{competitorId}")
+@app.delete("/api/Context/competitors/{projectId}/{competitorId}")
+async def delete_competitor(
+    projectId: str,
+    competitorId: str,
+    authorization: Optional[str] = Header(None)
+):
+    return await delete_context_item(projectId, "competitors", competitorId, authorization)
 
 @app.get("/api/context/topics/{projectId}")
 async def get_topics(
     projectId: str,
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    return project["topics"]
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    return json_payload(list(context_items(project, "topics").values()))
 
 @app.post("/api/context/topics/{projectId}")
 async def save_topics(
     projectId: str,
-    topics: List[Topic] = Body(...), 
+    topics: Union[List[Topic], Topic] = Body(...), 
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    project = check_project_permission(projectId, user_id)
-    project["topics"] = [t.dict() for t in topics]
-    return {"status": "success"}
+    if isinstance(topics, list):
+        return await replace_context_section(projectId, "topics", topics, authorization)
+    return await upsert_context_item(projectId, "topics", topics, authorization)
 
-@app.get("/api/projects/my")
-async def my_projects(
+@app.patch("/api/context/topics/{projectId}/{topicId}")
+async def update_topic(
+    projectId: str,
+    topicId: str,
+    changes: Dict[str, Any] = Body(...),
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    user_projects = [p for p in projects.values() if p["userId"] == user_id]
-    return {"projects": user_projects}
+    return await patch_context_item(projectId, "topics", topicId, changes, authorization)
 
-# --- Dashboard Endpoints ---
+@app.delete("/api/context/topics/{projectId}/{topicId}")
+async def delete_topic(
+    projectId: str,
+    topicId: str,
+    authorization: Optional[str] = Header(None)
+):
+    return await delete_context_item(projectId, "topics", topicId, authorization)
 
-@app.get("/api/dashboard-overview/{projectId}", response_model=DashboardOverview)
-async def get_dashboard_overview(projectId: str, authorization: Optional[str] = Header(None)):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
+topic_name_indexes = {}  # projectId -> (topics version, {lowercased name: topicId})
+
+def topic_name_index(project: dict) -> Dict[str, str]:
+    """Lowercased topic name -> topic id, rebuilt only after other topic edits."""
+    version = project.get("sectionVersions", {}).get("topics", 0)
+    cached = topic_name_indexes.get(project["id"])
+    if cached is None or cached[0] != version:
+        names = {}
+        for key, item in context_items(project, "topics").items():
+            names.setdefault(item["name"].lower(), key)
+        cached = topic_name_indexes[project["id"]] = (version, names)
+    return cached[1]
+
+# The frontend's topic editor sends and deletes topics by text
+@app.post("/api/context/keytopics/{projectId}")
+async def add_key_topic(
+    projectId: str,
+    payload: KeyTopic = Body(...),
+    authorization: Optional[str] = Header(None)
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    items = context_items(project, "topics")
+    names = topic_name_index(project)
+    key = names.get(payload.topic.lower())
+    if key is not None:
+        return items[key]
+    topic_id = len(items) + 1
+    while str(topic_id) in items:
+        topic_id += 1
+    items[str(topic_id)] = Topic(id=topic_id, name=payload.topic).dict()
+    version = project.get("sectionVersions", {}).get("topics", 0)
+    await commit_context(project, "topics")
+    # carry the index over this edit instead of rebuilding it on the next add
+    names[payload.topic.lower()] = str(topic_id)
+    if project["sectionVersions"]["topics"] == version + 1:
+        topic_name_indexes[project["id"]] = (version + 1, names)
+    return items[str(topic_id)]
+
+@app.delete("/api/context/keytopics/{projectId}/{topic}")
+async def delete_key_topic(
+    projectId: str,
+    topic: str,
+    authorization: Optional[str] = Header(None)
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if topic not in context_items(project, "topics"):
+        topic = topic_name_index(project).get(topic.lower(), topic)
+    return await delete_context_item(projectId, "topics", topic, authorization)
+
+@app.patch("/api/context/{projectId}")
+async def patch_context(
+    projectId: str,
+    operations: List[ContextPatchOperation] = Body(...),
+    authorization: Optional[str] = Header(None)
+):
+    """JSON-Patch style bulk edit of personas, competitors and topics.
+
+    Paths are ``/<section>/<itemId>`` (``/<section>/-`` to add by the value's
+    id). Supports add, replace and remove. The batch applies atomically: if
+    any operation fails, nothing is saved.
+    """
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if len(operations) > MAX_PATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PATCH_OPERATIONS} operations per patch")
+    staged = {}  # section -> edited copy of its items
+    for index, operation in enumerate(operations):
+        parts = operation.path.split("/")
+        if len(parts) != 3 or parts[0] or parts[1] not in CONTEXT_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Operation {index}: unsupported path {operation.path}")
+        section, item_id = parts[1], parts[2].replace("~1", "/").replace("~0", "~")
+        if section not in staged:
+            staged[section] = dict(context_items(project, section))
+        items = staged[section]
+        if operation.op == "remove":
+            if items.pop(item_id, None) is None:
+                raise HTTPException(status_code=404, detail=f"Operation {index}: unknown {section[:-1]} {item_id}")
+            continue
+        if operation.op not in ("add", "replace") or operation.value is None:
+            raise HTTPException(status_code=400, detail=f"Operation {index}: expected add, replace or remove with a value")
+        data = validate_context_item(section, operation.value)
+        key = context_item_id(data)
+        if item_id != key and not (operation.op == "add" and item_id == "-"):
+            raise HTTPException(status_code=400, detail=f"Operation {index}: path id {item_id} does not match value id {key}")
+        if operation.op == "replace" and key not in items:
+            raise HTTPException(status_code=404, detail=f"Operation {index}: unknown {section[:-1]} {key}")
+        items[key] = data
+    if staged:
+        project.update(staged)
+        await commit_context(project, *staged)
+    return {"status": "success", "applied": len(operations)}
+
+@app.get("/api/projects/my")
+async def my_projects(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    authorization: Optional[str] = Header(None)
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    user_projects, next_cursor = await run_store(project_store.list_for_user, user_id, cursor, limit)
+    return json_payload({"projects": [public_project(p) for p in user_projects], "nextCursor": next_cursor})
+
+# --- Synthetic analytics ---
+
+PLATFORM_LIST = ["chatgpt", "meta", "perplexity", "claude", "google-ai"]
+
+SERIES_SEED = os.environ.get("MOCK_SERIES_SEED", "0")
+SERIES_DAYS = int(os.environ.get("MOCK_SERIES_DAYS", "730"))
+SERIES_END = date.fromisoformat(os.environ.get("MOCK_SERIES_END", date.today().isoformat()))
+SERIES_PLATFORMS = [
+    p.strip() for p in os.environ.get("MOCK_SERIES_PLATFORMS", ",".join(PLATFORM_LIST)).split(",") if p.strip()
+]
+SERIES_COLUMNS = (
+    "responses", "present", "top", "middle", "bottom",
+    "sources", "brand_sources", "competitor_sources",
+)
+ALL_PLATFORMS = "all"
+DEFAULT_RANGE_DAYS = 30
+
+def _drift(rng: random.Random, value: float, step: float, low: float, high: float) -> float:
+    return min(high, max(low, value + rng.uniform(-step, step)))
+
+class ProjectSeries:
+    """Deterministic daily analytics for one project, stored column-wise.
+
+    ``days`` holds sorted date ordinals shared by every platform; each
+    platform (plus the precomputed ``all`` rollup) maps column names to
+    ``array('i')`` values aligned with ``days``. Date ranges resolve to an
+    index window by binary search, so a query only touches the days it returns.
+
+    ``lock`` guards the project's analytics as a whole: ingest batches apply
+    under it on a worker thread, and reads go through it
+    (``read_project_analytics``, ``locked_call``), so nothing sees or caches
+    a series, citation store or rollup that a batch is halfway through.
+    """
+
+    def __init__(self, project_id: str, platforms: List[str] = SERIES_PLATFORMS,
+                 days: int = SERIES_DAYS, end: date = SERIES_END):
+        first = end.toordinal() - days + 1
+        self.days = array("i", range(first, end.toordinal() + 1))
+        self.platforms = {}
+        for platform in platforms:
+            self.platforms[platform] = self._generate(random.Random(f"{SERIES_SEED}:{project_id}:{platform}"))
+        rollup = {name: array("i", bytes(4 * len(self.days))) for name in SERIES_COLUMNS}
+        for columns in self.platforms.values():
+            for name in SERIES_COLUMNS:
+                target, source = rollup[name], columns[name]
+                for i in range(len(target)):
+                    target[i] += source[i]
+        self.platforms[ALL_PLATFORMS] = rollup
+        self.project_id = project_id
+        self.prefixes = {}  # ("column", platform, name) / ("competitor", name) -> cumulative array
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_columns(cls, project_id: str, days: array, platforms: Dict[str, Dict[str, array]]) -> "ProjectSeries":
+        """Rebuild a series from stored columns (snapshots) without regenerating it."""
+        series = cls.__new__(cls)
+        series.days = days
+        series.platforms = platforms
+        series.project_id = project_id
+        series.prefixes = {}
+        series.lock = threading.RLock()
+        return series
+
+    def _generate(self, rng: random.Random) -> Dict[str, array]:
+        columns = {name: array("i") for name in SERIES_COLUMNS}
+        presence, top_share, brand_share, competitor_share = (
+            rng.uniform(0.3, 0.7), rng.uniform(0.2, 0.5), rng.uniform(0.1, 0.4), rng.uniform(0.1, 0.3)
+        )
+        for _ in self.days:
+            presence = _drift(rng, presence, 0.03, 0.05, 0.95)
+            top_share = _drift(rng, top_share, 0.03, 0.05, 0.7)
+            brand_share = _drift(rng, brand_share, 0.02, 0.02, 0.6)
+            competitor_share = _drift(rng, competitor_share, 0.02, 0.02, 0.35)
+            responses = rng.randint(20, 60)
+            present = round(responses * presence)
+            top = round(present * top_share)
+            middle = rng.randint(0, present - top)
+            sources = responses * rng.randint(3, 8)
+            brand = round(sources * brand_share)
+            competitor = round(sources * competitor_share)
+            for name, value in (
+                ("responses", responses), ("present", present), ("top", top),
+                ("middle", middle), ("bottom", present - top - middle),
+                ("sources", sources), ("brand_sources", brand), ("competitor_sources", competitor),
+            ):
+                columns[name].append(value)
+        return columns
+
+    def columns(self, platform: Optional[str]) -> Dict[str, array]:
+        columns = self.platforms.get(platform or ALL_PLATFORMS)
+        if columns is None:
+            raise HTTPException(status_code=400, detail=f"Unknown platform: {platform}")
+        return columns
+
+    def window(self, start: Optional[date], end: Optional[date]):
+        """Index range [lo, hi) covering start..end; defaults to the last 30 days."""
+        if end is None:
+            end_ord = self.days[-1]
+        else:
+            end_ord = end.toordinal()
+        start_ord = start.toordinal() if start else end_ord - DEFAULT_RANGE_DAYS + 1
+        if start_ord > end_ord:
+            raise HTTPException(status_code=400, detail="startDate must not be after endDate")
+        return bisect_left(self.days, start_ord), bisect_right(self.days, end_ord)
+
+    def prefix(self, column: str, platform: str = ALL_PLATFORMS) -> array:
+        """Cumulative sums of one platform's column, length len(days) + 1."""
+        key = ("column", platform, column)
+        cumulative = self.prefixes.get(key)
+        if cumulative is None:
+            with self.lock:
+                cumulative = self.prefixes.get(key)
+                if cumulative is None:
+                    cumulative = self.prefixes[key] = _cumulative(self.platforms[platform][column])
+        return cumulative
+
+    def competitor_prefix(self, name: str) -> array:
+        """Cumulative daily mention counts for a competitor, generated on first use.
+
+        Mentions depend only on the project and competitor name, so editing a
+        project's competitor list never invalidates existing prefixes.
+        """
+        key = ("competitor", name)
+        cumulative = self.prefixes.get(key)
+        if cumulative is None:
+            with self.lock:
+                cumulative = self.prefixes.get(key)
+                if cumulative is None:
+                    rng = random.Random(f"{SERIES_SEED}:{self.project_id}:competitor:{name}")
+                    share = rng.uniform(0.1, 0.8)
+                    mentions = array("i")
+                    for responses in self.platforms[ALL_PLATFORMS]["responses"]:
+                        share = _drift(rng, share, 0.03, 0.02, 0.95)
+                        mentions.append(round(responses * share))
+                    cumulative = self.prefixes[key] = _cumulative(mentions)
+        return cumulative
+
+    def extend_to(self, day: int):
+        """Append empty days through ``day`` so newer observations have somewhere to land."""
+        with self.lock:
+            added = day - self.days[-1]
+            if added <= 0:
+                return
+            self.days.extend(range(self.days[-1] + 1, day + 1))
+            for columns in self.platforms.values():
+                for values in columns.values():
+                    values.extend([0] * added)
+            for cumulative in self.prefixes.values():
+                cumulative.extend([cumulative[-1]] * added)
+
+    def index_of(self, day: int) -> int:
+        i = bisect_left(self.days, day)
+        if i == len(self.days) or self.days[i] != day:
+            raise HTTPException(status_code=400, detail=f"{date.fromordinal(day)} is before the first series day")
+        return i
+
+    def add(self, platform: str, day: int, deltas: Dict[str, int]):
+        """Add ``deltas`` to one day of ``platform`` and of the ``all`` rollup.
+
+        Cached prefixes are patched from that day on rather than dropped, so
+        adding to the latest day is O(1) per column and reads never rebuild them.
+        """
+        with self.lock:
+            self.extend_to(day)
+            i = self.index_of(day)
+            for scope in (platform, ALL_PLATFORMS):
+                columns = self.platforms[scope]
+                for name, value in deltas.items():
+                    columns[name][i] += value
+                    cumulative = self.prefixes.get(("column", scope, name))
+                    if cumulative is not None:
+                        _shift_tail(cumulative, i + 1, value)
+
+    def add_mentions(self, name: str, day: int, mentions: int):
+        with self.lock:
+            self.extend_to(day)
+            _shift_tail(self.competitor_prefix(name), self.index_of(day) + 1, mentions)
+
+    def anchor(self, end: Optional[date]) -> int:
+        """Exclusive index just past ``end`` (or past the last day)."""
+        return bisect_right(self.days, end.toordinal()) if end else len(self.days)
+
+    def trailing(self, hi: int, days: int) -> int:
+        """Start index of the ``days``-long window ending just before ``hi``."""
+        if hi == 0:
+            return 0
+        return bisect_left(self.days, self.days[hi - 1] - days + 1, 0, hi)
+
+    def buckets(self, lo: int, hi: int, granularity: str):
+        """Yield (period, i, j) slices of [lo, hi), one per day or ISO week."""
+        if granularity == "day":
+            for i in range(lo, hi):
+                yield date.fromordinal(self.days[i]).isoformat(), i, i + 1
+            return
+        i = lo
+        while i < hi:
+            day = date.fromordinal(self.days[i])
+            week_start = day - timedelta(days=day.weekday())
+            j = min(hi, bisect_left(self.days, week_start.toordinal() + 7, i))
+            yield week_start.isoformat(), i, j
+            i = j
+
+def _cumulative(values: array) -> array:
+    cumulative = array("q", [0])
+    total = 0
+    for value in values:
+        total += value
+        cumulative.append(total)
+    return cumulative
+
+def _shift_tail(cumulative: array, start: int, value: int):
+    for k in range(start, len(cumulative)):
+        cumulative[k] += value
+
+series_store = {}  # projectId -> ProjectSeries
+
+def get_project_series(project_id: str) -> ProjectSeries:
+    series = series_store.get(project_id)
+    if series is None:
+        if active_snapshot is not None:
+            series = active_snapshot.load_series(project_id)
+        series = series_store[project_id] = series or ProjectSeries(project_id)
+    return series
+
+def locked_call(lock, build, *args, **kwargs):
+    with lock:
+        return build(*args, **kwargs)
+
+async def read_project_analytics(project_id: str, build, *args, **kwargs):
+    """Run ``build`` against a project's analytics under its series lock.
+
+    An uncontended read runs inline; one that would wait for an ingest batch
+    waits on a worker thread instead of blocking the event loop.
+    """
+    lock = get_project_series(project_id).lock
+    if lock.acquire(blocking=False):
+        try:
+            return build(*args, **kwargs)
+        finally:
+            lock.release()
+    return await run_in_threadpool(locked_call, lock, build, *args, **kwargs)
+
+DEFAULT_COMPETITORS = ["Fivetran", "Matillion", "Airbyte", "Talend", "Stitch"]
+
+def project_competitor_names(project: dict) -> List[str]:
+    return [c["name"] for c in context_items(project, "competitors").values()] or DEFAULT_COMPETITORS
+
+def parse_date_param(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+
+def check_granularity(granularity: str) -> str:
+    if granularity not in ("day", "week"):
+        raise HTTPException(status_code=400, detail="granularity must be 'day' or 'week'")
+    return granularity
+
+def _pct(part: int, whole: int) -> float:
+    return round(100 * part / whole, 2) if whole else 0.0
+
+def series_rows(projectId: str, startDate, endDate, platform, granularity):
+    """Resolve filters to the column set and (period, i, j) buckets to aggregate."""
+    series = get_project_series(projectId)
+    columns = series.columns(platform)
+    lo, hi = series.window(parse_date_param(startDate, "startDate"), parse_date_param(endDate, "endDate"))
+    return columns, series.buckets(lo, hi, check_granularity(granularity))
+
+# --- Dashboard Endpoints ---
+
+# Panel builders take the already-authorized project plus the panel's query
+# parameters (as strings) and return the payload. The GET routes and the
+# batch endpoint both go through them, so they share cache entries too.
+
+def build_dashboard_overview(project: dict) -> DashboardOverview:
     return DashboardOverview(
         prompts=325,
         responses=6463,
@@ -360,150 +2067,281 @@ async def get_dashboard_overview(projectId: str, authorization: Optional[str] =
         ],
     )
 
+MAX_PRESENCE_WINDOWS = 16
+
+def parse_windows(windows: Optional[str]) -> List[int]:
+    if not windows:
+        return []
+    try:
+        sizes = [int(w) for w in windows.split(",") if w.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid windows: {windows}")
+    if len(sizes) > MAX_PRESENCE_WINDOWS or any(size < 1 for size in sizes):
+        raise HTTPException(status_code=400, detail=f"Invalid windows: {windows}")
+    return sizes
+
+def build_competitor_presence(
+    project: dict,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    windows: Optional[str] = None,
+) -> List[CompetitorPresence]:
+    start = parse_date_param(start_date, "start-date")
+    end = parse_date_param(end_date, "end-date")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start-date must not be after end-date")
+    extra_windows = parse_windows(windows)
+
+    # Every window is two lookups into prefix sums, anchored at end-date
+    series = get_project_series(project["id"])
+    responses = series.prefix("responses")
+    hi = series.anchor(end)
+    spans = {size: series.trailing(hi, size) for size in {7, 28, 84, *extra_windows}}
+    range_lo = bisect_left(series.days, start.toordinal(), 0, hi) if start else None
+
+    def presence(cumulative: array, lo: int) -> float:
+        return _pct(cumulative[hi] - cumulative[lo], responses[hi] - responses[lo])
+
+    keys = [(project["brandInfo"]["name"], False, series.prefix("present"))]
+    keys += [(name, True, series.competitor_prefix(name)) for name in project_competitor_names(project)]
+    return [
+        CompetitorPresence(
+            Key=key,
+            IsCompetitor=is_competitor,
+            presence7Days=presence(cumulative, spans[7]),
+            presence4Weeks=presence(cumulative, spans[28]),
+            presence12Weeks=presence(cumulative, spans[84]),
+            presenceRange=presence(cumulative, range_lo) if range_lo is not None else None,
+            presenceWindows={str(size): presence(cumulative, spans[size]) for size in extra_windows} or None,
+        )
+        for key, is_competitor, cumulative in keys
+    ]
+
+def build_position(
+    project: dict,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+) -> List[PositionEntry]:
+    columns, buckets = series_rows(project["id"], startDate, endDate, platform, granularity)
+    rows = []
+    for period, i, j in buckets:
+        total = sum(columns["responses"][i:j])
+        present = sum(columns["present"][i:j])
+        rows.append(PositionEntry(
+            period=period,
+            top=sum(columns["top"][i:j]),
+            middle=sum(columns["middle"][i:j]),
+            bottom=sum(columns["bottom"][i:j]),
+            total=total,
+            missing=total - present,
+        ))
+    return rows
+
+def build_presence(
+    project: dict,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+) -> List[PresenceEntry]:
+    columns, buckets = series_rows(project["id"], startDate, endDate, platform, granularity)
+    rows = []
+    for period, i, j in buckets:
+        total = sum(columns["responses"][i:j])
+        present = sum(columns["present"][i:j])
+        rows.append(PresenceEntry(
+            period=period,
+            total_responses=total,
+            present_count=present,
+            present_percentage=_pct(present, total),
+        ))
+    return rows
+
+def build_citations(
+    project: dict,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+) -> List[CitationEntry]:
+    columns, buckets = series_rows(project["id"], startDate, endDate, platform, granularity)
+    rows = []
+    for period, i, j in buckets:
+        sources = sum(columns["sources"][i:j])
+        brand = sum(columns["brand_sources"][i:j])
+        competitor = sum(columns["competitor_sources"][i:j])
+        rows.append(CitationEntry(
+            period=period,
+            total_responses=sum(columns["responses"][i:j]),
+            total_sources=sources,
+            brand_source_count=brand,
+            competitor_source_count=competitor,
+            third_party_sources=sources - brand - competitor,
+            brand_percentage=_pct(brand, sources),
+            competitor_percentage=_pct(competitor, sources),
+            third_party_percentage=_pct(sources - brand - competitor, sources),
+        ))
+    return rows
+
+SERIES_FILTERS = {"startDate": "startDate", "endDate": "endDate", "platform": "platform", "granularity": "granularity"}
+
+# panel name -> (route prefix, builder, {query param: builder kwarg})
+DASHBOARD_PANELS = {
+    "dashboard-overview": ("/api/dashboard-overview/", build_dashboard_overview, {}),
+    "competitor-presence": (
+        "/api/competitor-presence/",
+        build_competitor_presence,
+        {"start-date": "start_date", "end-date": "end_date", "windows": "windows"},
+    ),
+    "position": ("/api/position/", build_position, SERIES_FILTERS),
+    "presence": ("/api/presence/", build_presence, SERIES_FILTERS),
+    "citations": ("/api/citations/", build_citations, SERIES_FILTERS),
+}
+
+@app.get("/api/dashboard-overview/{projectId}", response_model=DashboardOverview)
+async def get_dashboard_overview(
+    projectId: str,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    return cache_store(request, project, build_dashboard_overview(project))
+
 @app.get("/api/competitor-presence/{projectId}", response_model=List[CompetitorPresence])
 async def get_competitor_presence(
     projectId: str,
+    request: Request,
     start_date: Optional[str] = Query(None, alias="start-date"),
     end_date: Optional[str] = Query(None, alias="end-date"),
+    windows: Optional[str] = Query(None, description="Comma-separated extra window sizes in days, e.g. 14,90"),
     authorization: Optional[str] = Header(None),
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
-    return [
-        CompetitorPresence(
-            Key="CompetitorA",
-            IsCompetitor=True,
-            presence7Days=12,
-            presence4Weeks=47,
-            presence12Weeks=67,
-        ),
-        CompetitorPresence(
-            Key="CompetitorB",
-            IsCompetitor=True,
-            presence7Days=23,
-            presence4Weeks=67,
-            presence12Weeks=88,
-        ),
-        CompetitorPresence(
-            Key="CompetitorC",
-            IsCompetitor=False,
-            presence7Days=23,
-            presence4Weeks=67,
-            presence12Weeks=88,
-        ),
-        CompetitorPresence(
-            Key="CompetitorD",
-            IsCompetitor=True,
-            presence7Days=23,
-            presence4Weeks=67,
-            presence12Weeks=88,
-        ),
-        CompetitorPresence(
-            Key="CompetitorE",
-            IsCompetitor=True,
-            presence7Days=23,
-            presence4Weeks=67,
-            presence12Weeks=88,
-        ),
-    ]
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_competitor_presence, project, start_date, end_date, windows)
+    return cache_store(request, project, payload)
 
 @app.get("/api/position/{projectId}", response_model=List[PositionEntry])
-async def get_position(projectId: str, authorization: Optional[str] = Header(None)):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
-    return [
-        PositionEntry(
-                period="2025-07-01",
-                top=40,
-                middle=50,
-                bottom=10,
-                total=100,
-                missing=0,
-            ),
-        PositionEntry(
-                period="2025-09-23",
-                top=49,
-                middle=46,
-                bottom=5,
-                total=100,
-                missing=0,
-            )
-    ]
-    
+async def get_position(
+    projectId: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_position, project, startDate, endDate, platform, granularity)
+    return cache_store(request, project, payload)
 
 @app.get("/api/presence/{projectId}", response_model=List[PresenceEntry])
-async def get_presence(projectId: str, authorization: Optional[str] = Header(None)):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
-    return [
-        PresenceEntry(
-            period="2025-07-30",
-            total_responses=100,
-            present_count=70,
-            present_percentage=70,
-        ),
-        PresenceEntry(
-            period="2025-07-30",
-            total_responses=200,
-            present_count=50,
-            present_percentage=25,
-        )
-    ]
+async def get_presence(
+    projectId: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_presence, project, startDate, endDate, platform, granularity)
+    return cache_store(request, project, payload)
 
 @app.get("/api/citations/{projectId}", response_model=List[CitationEntry])
-async def get_citations(projectId: str, authorization: Optional[str] = Header(None)):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
-    return [
-        CitationEntry(
-            period="2025-07-30",
-            total_responses=140,
-            total_sources=1400,
-            brand_source_count=600,
-            competitor_source_count=200,
-            third_party_sources=600,
-            brand_percentage=20,
-            competitor_percentage=40,
-            third_party_percentage=40,
-        ),
-        CitationEntry(
-            period="2025-08-07",
-            total_responses=140,
-            total_sources=1400,
-            brand_source_count=600,
-            competitor_source_count=200,
-            third_party_sources=600,
-            brand_percentage=40,
-            competitor_percentage=20,
-            third_party_percentage=40,
-        ),
-        CitationEntry(
-            period="2025-08-14",
-            total_responses=140,
-            total_sources=1400,
-            brand_source_count=600,
-            competitor_source_count=200,
-            third_party_sources=600,
-            brand_percentage=60,
-            competitor_percentage=30,
-            third_party_percentage=10,
-        ),
-        CitationEntry(
-            period="2025-08-21",
-            total_responses=140,
-            total_sources=1400,
-            brand_source_count=600,
-            competitor_source_count=200,
-            third_party_sources=600,
-            brand_percentage=29,
-            competitor_percentage=11,
-            third_party_percentage=60,
-        )
-    ]
+async def get_citations(
+    projectId: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    granularity: str = "day",
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_citations, project, startDate, endDate, platform, granularity)
+    return cache_store(request, project, payload)
+
+MAX_BATCH_PANELS = 32
+
+async def render_panel(project: dict, panel: DashboardPanelRequest) -> bytes:
+    """One batch panel as an encoded envelope: {"id", "panel", "status", "data"|"detail"}."""
+    head = {"id": panel.id or panel.panel, "panel": panel.panel}
+    try:
+        spec = DASHBOARD_PANELS.get(panel.panel)
+        if spec is None:
+            raise HTTPException(status_code=400, detail=f"Unknown panel: {panel.panel}")
+        route, builder, accepted = spec
+        unknown = sorted(set(panel.params) - set(accepted))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown {panel.panel} params: {', '.join(unknown)}")
+        key = ResponseCache.key_for(project, route + "{projectId}", route + project["id"], panel.params.items())
+        entry = response_cache.get(key)
+        if entry is None:
+            kwargs = {accepted[name]: value for name, value in panel.params.items()}
+            # builders are CPU work; run them on the threadpool so panels overlap
+            # with each other and with the rest of the event loop
+            payload = await run_in_threadpool(locked_call, get_project_series(project["id"]).lock, builder, project, **kwargs)
+            entry = response_cache.put(key, _dump_json(payload))
+    except HTTPException as exc:
+        return _dump_json({**head, "status": exc.status_code, "detail": exc.detail})
+    # splice the cached body in as-is rather than decoding and re-encoding it
+    head["status"] = 200
+    return _dump_json(head)[:-1] + b',"data":' + entry[1] + b"}"
+
+@app.post("/api/dashboard/{projectId}")
+async def get_dashboard_batch(
+    projectId: str,
+    batch: DashboardBatchRequest = Body(...),
+    authorization: Optional[str] = Header(None),
+):
+    """Several dashboard panels in one round trip, under one auth check.
+
+    Panels render concurrently. A failing panel reports its own status and
+    does not fail the batch. With ``stream`` the response is NDJSON, one
+    envelope per panel in completion order; otherwise it is
+    ``{"panels": [...]}`` in request order.
+    """
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if not batch.panels or len(batch.panels) > MAX_BATCH_PANELS:
+        raise HTTPException(status_code=400, detail=f"Request between 1 and {MAX_BATCH_PANELS} panels")
+    get_project_series(projectId)  # build the series once, before the panels fan out
+
+    if batch.stream:
+        async def stream():
+            for done in asyncio.as_completed([render_panel(project, panel) for panel in batch.panels]):
+                yield await done + b"\n"
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    bodies = await asyncio.gather(*(render_panel(project, panel) for panel in batch.panels))
+    return Response(content=b'{"panels":[' + b",".join(bodies) + b"]}", media_type="application/json")
 
 @app.get("/test")
 async def get_all_test():
-    return projects
+    return {pid: public_project(project) for pid, project in (await run_store(project_store.all)).items()}
 
 
 class PromptPersona(BaseModel):
@@ -548,88 +2386,598 @@ class ObservationsResponse(BaseModel):
     limit: Optional[int] 
     observations: List[Observation]
 
+# --- Observation catalogue ---
+
+# Demo seeds and personas
+PROMPT_TEXTS = [
+    "What are the best no-code platforms for integrating data from multiple sources?",
+    "How do you ensure data quality in modern ETL pipelines?",
+    "Top strategies for multi-cloud data warehousing.",
+    "Key considerations for GDPR compliance in data processing.",
+    "Biggest trends in AI-powered analytics for 2025."
+]
+PERSONA_NAMES = [
+    "Data-Driven Business Analyst",
+    "Cloud Architect",
+    "Compliance Officer",
+    "AI Product Manager",
+    "BI Analyst"
+]
+CATEGORIES = [
+    "Option Generation", "QA", "Strategy", "Compliance", "Forecasting"
+]
+
+OBSERVATION_TIMESTAMP = "2025-07-31T13:23:51.585608Z"
+OBSERVATION_BASE_ID = 513800
+DEFAULT_OBSERVATION_SCALE = 10
+MAX_OBSERVATION_SCALE = 1_000_000
+
+def make_seed_prompt(prompt_id: int, idx: int) -> SeedPrompt:
+    name = PERSONA_NAMES[idx % len(PERSONA_NAMES)]
+    return SeedPrompt(
+        id=prompt_id,
+        status="active",
+        text=PROMPT_TEXTS[idx % len(PROMPT_TEXTS)],
+        favorite=bool(idx % 2),
+        branded=False,
+        persona=Persona(id=6500 + idx, name=name, description=f"Persona: {name}"),
+        category=CATEGORIES[idx % len(CATEGORIES)],
+        topics=[
+            Topic(id=10000 + idx, name="General Data"),
+            Topic(id=10001 + idx, name="Best Practices"),
+            Topic(id=10002 + idx, name="Trends 2025"),
+        ],
+        tags=["tag1", "tag2"],
+        last_updated=OBSERVATION_TIMESTAMP,
+        created_at="2025-07-30T22:13:51.585608Z",
+        platforms=PLATFORM_LIST
+    )
+
+def observation_platform(n: int) -> str:
+    i, j = divmod(n, 2)
+    return PLATFORM_LIST[(i + j) % len(PLATFORM_LIST)]
+
+class StringTable:
+    """Interned strings (or tuples of them), each JSON-encoded once for row materialization."""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+        self.json = []
+
+    def add(self, value: str) -> int:
+        ident = self.ids.get(value)
+        if ident is None:
+            ident = self.ids[value] = len(self.json)
+            self.values.append(value)
+            self.json.append(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode())
+        return ident
+
+class ObservationColumns:
+    """Struct-of-arrays observation rows with a shared seed prompt table.
+
+    Strings are interned once in ``strings``; tag and platform lists are
+    interned whole in ``lists``. Seed prompts,
+    personas and topics are rows in their own tables, referenced by index,
+    and every column is an ``array``. Indexing or slicing materializes JSON
+    rows identical to the pydantic encoding, so this is a drop-in ``rows``
+    sequence like MappedRows.
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.lists = StringTable()
+        # observations
+        self.ids = array("q")
+        self.seeds = array("i")
+        self.platforms = array("i")
+        self.counts = array("i")
+        self.created = array("i")
+        self.updated = array("i")
+        # seed prompts
+        self.seed_ids = array("q")
+        self.seed_strings = array("i")  # status, text, category, last_updated, created_at per seed
+        self.seed_flags = array("B")    # bit 0 favorite, bit 1 branded
+        self.seed_personas = array("i")
+        self.seed_tags = array("i")
+        self.seed_platforms = array("i")
+        self.topic_start = array("i", [0])
+        self.topic_refs = array("i")
+        # personas and topics
+        self.persona_ids = array("q")
+        self.persona_strings = array("i")  # name, description, countries per persona
+        self.topic_ids = array("q")
+        self.topic_names = array("i")
+        self._personas = {}  # build-time dedupe, dropped by freeze()
+        self._topics = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add_seed(self, seed: dict) -> int:
+        s = self.strings.add
+        persona = seed["persona"]
+        key = (persona["id"], persona["name"], persona.get("description", ""), persona.get("countries", ""))
+        persona_row = self._personas.get(key)
+        if persona_row is None:
+            persona_row = self._personas[key] = len(self.persona_ids)
+            self.persona_ids.append(key[0])
+            self.persona_strings.extend((s(key[1]), s(key[2]), s(key[3])))
+        for topic in seed["topics"]:
+            key = (topic["id"], topic["name"])
+            topic_row = self._topics.get(key)
+            if topic_row is None:
+                topic_row = self._topics[key] = len(self.topic_ids)
+                self.topic_ids.append(key[0])
+                self.topic_names.append(s(key[1]))
+            self.topic_refs.append(topic_row)
+        self.topic_start.append(len(self.topic_refs))
+        self.seed_ids.append(seed["id"])
+        self.seed_strings.extend((
+            s(seed["status"]), s(seed["text"]), s(seed["category"]), s(seed["last_updated"]), s(seed["created_at"]),
+        ))
+        self.seed_flags.append(bool(seed["favorite"]) | bool(seed["branded"]) << 1)
+        self.seed_personas.append(persona_row)
+        self.seed_tags.append(self.lists.add(tuple(seed["tags"])))
+        self.seed_platforms.append(self.lists.add(tuple(seed["platforms"])))
+        return len(self.seed_ids) - 1
+
+    def add(self, observation_id: int, seed_row: int, platform: str, count: int, created_at: str, updated_at: str):
+        self.ids.append(observation_id)
+        self.seeds.append(seed_row)
+        self.platforms.append(self.strings.add(platform))
+        self.counts.append(count)
+        self.created.append(self.strings.add(created_at))
+        self.updated.append(self.strings.add(updated_at))
+
+    def freeze(self) -> "ObservationColumns":
+        self._personas = self._topics = None
+        return self
+
+    def seed_json(self, seed_row: int) -> bytes:
+        text, lists = self.strings.json, self.lists.json
+        status, prompt, category, last_updated, created_at = self.seed_strings[5 * seed_row:5 * seed_row + 5]
+        persona = self.seed_personas[seed_row]
+        name, description, countries = self.persona_strings[3 * persona:3 * persona + 3]
+        flags = self.seed_flags[seed_row]
+        topics = b",".join(
+            b'{"id":%d,"name":%s}' % (self.topic_ids[t], text[self.topic_names[t]])
+            for t in self.topic_refs[self.topic_start[seed_row]:self.topic_start[seed_row + 1]]
+        )
+        return (
+            b'{"id":%d,"status":%s,"text":%s,"favorite":%s,"branded":%s,'
+            b'"persona":{"id":%d,"name":%s,"description":%s,"countries":%s},'
+            b'"category":%s,"topics":[%s],"tags":%s,"last_updated":%s,"created_at":%s,"platforms":%s}' % (
+                self.seed_ids[seed_row], text[status], text[prompt],
+                b"true" if flags & 1 else b"false", b"true" if flags & 2 else b"false",
+                self.persona_ids[persona], text[name], text[description], text[countries],
+                text[category], topics, lists[self.seed_tags[seed_row]],
+                text[last_updated], text[created_at], lists[self.seed_platforms[seed_row]],
+            )
+        )
+
+    def row_json(self, n: int, seed_json: Optional[bytes] = None) -> bytes:
+        text = self.strings.json
+        return b'{"id":%d,"seed_prompt":%s,"platform":%s,"observation_count":%d,"created_at":%s,"updated_at":%s}' % (
+            self.ids[n], seed_json or self.seed_json(self.seeds[n]), text[self.platforms[n]],
+            self.counts[n], text[self.created[n]], text[self.updated[n]],
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            rows, seeds = [], {}
+            for n in range(*index.indices(len(self))):
+                seed = seeds.get(self.seeds[n])
+                if seed is None:
+                    seed = seeds[self.seeds[n]] = self.seed_json(self.seeds[n])
+                rows.append(self.row_json(n, seed))
+            return rows
+        if index < 0:
+            index += len(self)
+        return self.row_json(index)
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+class ObservationCatalogue:
+    """Immutable set of observation rows.
+
+    Every seed prompt is observed on two platforms. Generated catalogues keep
+    rows in ObservationColumns, so a page materializes only its own JSON;
+    snapshots supply already-encoded rows instead.
+    """
+
+    def __init__(self, size: int):
+        columns = ObservationColumns()
+        seed_row = 0
+        for n in range(size):
+            i, j = divmod(n, 2)
+            if j == 0:
+                seed_row = columns.add_seed(make_seed_prompt(131000 + i, i).dict())
+            columns.add(OBSERVATION_BASE_ID + n, seed_row, observation_platform(n), 10 + i * 5 + j,
+                        OBSERVATION_TIMESTAMP, OBSERVATION_TIMESTAMP)
+        self.rows = columns.freeze()
+
+    def summaries(self):
+        """Yield (id, prompt text, platform, observation_count) per row."""
+        rows = self.rows
+        if isinstance(rows, ObservationColumns):
+            text = rows.strings.values
+            for n in range(len(rows)):
+                yield rows.ids[n], text[rows.seed_strings[5 * rows.seeds[n] + 1]], text[rows.platforms[n]], rows.counts[n]
+            return
+        for raw in rows:
+            row = json.loads(raw)
+            yield row["id"], row["seed_prompt"]["text"], row["platform"], row["observation_count"]
+
+    @classmethod
+    def from_rows(cls, rows) -> "ObservationCatalogue":
+        """Wrap already-encoded rows (any sequence of JSON bytes supporting slicing)."""
+        catalogue = cls.__new__(cls)
+        catalogue.rows = rows
+        return catalogue
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def page_json(self, offset: int, limit: Optional[int]) -> bytes:
+        sliced = self.rows[offset: (offset + limit) if limit is not None else None]
+        return b'{"total":%d,"offset":%d,"limit":%s,"observations":[%s]}' % (
+            len(self.rows),
+            offset,
+            str(limit).encode() if limit is not None else b"null",
+            b",".join(sliced),
+        )
+
+# Catalogues are kept LRU within a budget of rows rather than of entries, so
+# a client cycling through a handful of scales doesn't rebuild on every
+# request. Scales in MOCK_CATALOGUE_SCALES are built at startup.
+CATALOGUE_CACHE_ROWS = int(os.environ.get("MOCK_CATALOGUE_CACHE_ROWS", "2000000"))
+PREBUILT_CATALOGUE_SCALES = [
+    int(s) for s in os.environ.get("MOCK_CATALOGUE_SCALES", str(DEFAULT_OBSERVATION_SCALE)).split(",") if s.strip()
+]
+
+class BuildCache:
+    """LRU of expensive, immutable builds bounded by their total ``len()``.
+
+    ``get`` builds a missing key at most once; concurrent callers for that
+    key wait on the one build. Builds take seconds at large scales, so async
+    handlers use ``fetch``, which builds on a worker thread.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.entries = OrderedDict()  # key -> built value, LRU first
+        self.lock = threading.Lock()
+        self.build_locks = {}  # key -> lock held while that key is built
+
+    def cached(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def get(self, key, build):
+        value = self.cached(key)
+        if value is not None:
+            return value
+        with self.lock:
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            value = self.entries.get(key)
+            if value is None:
+                value = build()
+                with self.lock:
+                    self.entries[key] = value
+                    rows = sum(len(v) for v in self.entries.values())
+                    while rows > self.max_rows and len(self.entries) > 1:
+                        _, evicted = self.entries.popitem(last=False)
+                        rows -= len(evicted)
+                    self.build_locks.pop(key, None)
+        return value
+
+    async def fetch(self, key, build):
+        value = self.cached(key)
+        if value is None:
+            value = await run_in_threadpool(self.get, key, build)
+        return value
+
+observation_catalogues = BuildCache(CATALOGUE_CACHE_ROWS)  # size -> ObservationCatalogue
+
+def build_observation_catalogue(size: int) -> ObservationCatalogue:
+    if active_snapshot is not None and size in active_snapshot.catalogue_sizes():
+        return active_snapshot.load_catalogue(size)
+    return ObservationCatalogue(size)
+
+def get_observation_catalogue(size: int = DEFAULT_OBSERVATION_SCALE) -> ObservationCatalogue:
+    return observation_catalogues.get(size, lambda: build_observation_catalogue(size))
+
+async def observation_catalogue(size: int = DEFAULT_OBSERVATION_SCALE) -> ObservationCatalogue:
+    return await observation_catalogues.fetch(size, lambda: build_observation_catalogue(size))
+
 @app.get("/api/prompt-observations", response_model=ObservationsResponse)
 async def get_observations(
-    offset: int = 0,
-    limit: Optional[int] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000, description="Observations per page"),
+    scale: int = Query(DEFAULT_OBSERVATION_SCALE, ge=1, le=MAX_OBSERVATION_SCALE),
     authorization: Optional[str] = Header(None),
 ):
-    user_id = get_userid_from_auth_header(authorization)
+    await get_userid_from_auth_header(authorization)
+    # Built once per scale; the default 10 rows match the original demo set
+    catalogue = await observation_catalogue(scale)
+    return Response(content=catalogue.page_json(offset, limit), media_type="application/json")
 
-    # Demo seeds, personas, platforms
-    prompt_texts = [
-        "What are the best no-code platforms for integrating data from multiple sources?",
-        "How do you ensure data quality in modern ETL pipelines?",
-        "Top strategies for multi-cloud data warehousing.",
-        "Key considerations for GDPR compliance in data processing.",
-        "Biggest trends in AI-powered analytics for 2025."
-    ]
-    persona_names = [
-        "Data-Driven Business Analyst",
-        "Cloud Architect",
-        "Compliance Officer",
-        "AI Product Manager",
-        "BI Analyst"
-    ]
-    categories = [
-        "Option Generation", "QA", "Strategy", "Compliance", "Forecasting"
-    ]
-    platform_list = ["chatgpt", "meta", "perplexity", "claude", "google-ai"]
+# --- Export ---
 
-    # Helper function to create a persona
-    def make_persona(pid, name):
-        return Persona(id=pid, name=name, description=f"Persona: {name}")
+EXPORT_COLUMNS = [
+    "projectId", "section", "id", "name", "alternativeNames", "description",
+    "country", "websites", "platform", "count",
+]
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+}
+EXPORT_BATCH_ROWS = 500
 
-    # Helper function to create topics
-    def make_topics(idx):
-        return [
-            Topic(id=10000 + idx, name="General Data"),
-            Topic(id=10001 + idx, name="Best Practices"),
-            Topic(id=10002 + idx, name="Trends 2025"),
-        ]
+def iter_export_rows(user_projects: List[dict], catalogue: ObservationCatalogue):
+    """Yield one flat dict per exported record, project by project."""
+    for project in user_projects:
+        pid = project["id"]
+        brand = project["brandInfo"]
+        yield {"projectId": pid, "section": "brand", **brand}
+        for persona in context_items(project, "personas").values():
+            yield {"projectId": pid, "section": "persona", "country": persona.get("countries", ""), **persona}
+        for competitor in context_items(project, "competitors").values():
+            yield {"projectId": pid, "section": "competitor", **competitor}
+        for topic in context_items(project, "topics").values():
+            yield {"projectId": pid, "section": "topic", **topic}
+        for observation_id, text, platform, count in catalogue.summaries():
+            yield {
+                "projectId": pid,
+                "section": "observation",
+                "id": observation_id,
+                "name": text,
+                "platform": platform,
+                "count": count,
+            }
+
+def stream_export(rows, fmt: str):
+    """Encode export rows in small batches so memory stays flat and bytes flow immediately."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for n, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if n % EXPORT_BATCH_ROWS == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+        return
+    # ndjson: one object per line; json: the same objects inside a streamed array
+    batch = []
+    written = 0
+    for written, row in enumerate(rows, 1):
+        encoded = json.dumps({k: row.get(k, "") for k in EXPORT_COLUMNS}, ensure_ascii=False)
+        if fmt == "ndjson":
+            batch.append(encoded + "\n")
+        else:
+            batch.append(("[" if written == 1 else ",") + encoded)
+        if len(batch) >= EXPORT_BATCH_ROWS:
+            yield "".join(batch).encode()
+            batch = []
+    if fmt == "json":
+        batch.append("]" if written else "[]")
+    yield "".join(batch).encode()
+
+@app.get("/context/export")
+@app.get("/api/context/export")
+async def export_context(
+    format: str = "csv",
+    projectId: Optional[str] = None,
+    scale: int = Query(DEFAULT_OBSERVATION_SCALE, ge=1, le=MAX_OBSERVATION_SCALE),
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv, ndjson or json")
+    if projectId:
+        user_projects = [await check_project_permission(projectId, user_id)]
+    else:
+        user_projects, _ = await run_store(project_store.list_for_user, user_id)
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"context-export-{date.today().isoformat()}.{extension}"
+    return StreamingResponse(
+        stream_export(iter_export_rows(user_projects, await observation_catalogue(scale)), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# --- Prompt store & bulk upload ---
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+UPLOAD_BATCH_ROWS = 1000
+UPLOAD_MAX_ERRORS = 1000
+UPLOADED_PROMPT_BASE_ID = 2_000_000
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+class PromptStore:
+    """Seed prompts per project, kept apart from the project dict so
+    context endpoints never serialize them."""
+
+    def __init__(self):
+        self.prompts = {}   # projectId -> [seed prompt dict, ...]
+        self.owners = {}    # prompt id -> projectId
+        self.ids = count(UPLOADED_PROMPT_BASE_ID)
+
+    def list(self, project_id: str) -> List[dict]:
+        return self.prompts.get(project_id, [])
+
+    def add_batch(self, project_id: str, batch: List[dict]):
+        self.prompts.setdefault(project_id, []).extend(batch)
+        for prompt in batch:
+            self.owners[prompt["id"]] = project_id
 
-    # Helper function to create seed prompt
-    def make_seed_prompt(prompt_id, idx):
+prompt_store = PromptStore()
+
+def _split_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in re.split(r"[|;]", value or "") if item.strip()]
+
+def _iter_text_lines(binary, chunk_size: int = UPLOAD_CHUNK_BYTES):
+    """Decode a binary file chunk by chunk, yielding lines with their endings."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending, offset = "", 0
+    for chunk in iter(lambda: binary.read(chunk_size), b""):
+        try:
+            text = decoder.decode(chunk)
+        except UnicodeDecodeError as exc:
+            raise HTTPException(
+                status_code=400, detail=f"File is not UTF-8 (near byte {offset + exc.start}); re-save it as CSV UTF-8",
+            )
+        offset += len(chunk)
+        parts = (pending + text).split("\n")
+        pending = parts.pop()
+        for part in parts:
+            yield part + "\n"
+    try:
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File is not UTF-8 (truncated character at the end)")
+    if pending:
+        yield pending
+
+class PromptRowParser:
+    """Turns CSV rows into validated ``SeedPrompt`` dicts for one project.
+
+    Columns: text (or prompt), category, persona, topics, tags, platforms,
+    branded, favorite, status. List columns are ``|`` or ``;`` separated.
+    Personas and topics resolve to the project's ids by name; unknown names
+    get ids allocated for this upload.
+    """
+
+    def __init__(self, project: dict):
+        self.personas = {p["name"].lower(): p for p in context_items(project, "personas").values()}
+        self.topics = {t["name"].lower(): t["id"] for t in context_items(project, "topics").values()}
+        self.next_local_id = count(900_000)
+        self.timestamp = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def _persona(self, name: str) -> dict:
+        key = name.lower()
+        if key not in self.personas:
+            self.personas[key] = {"id": next(self.next_local_id), "name": name}
+        return self.personas[key]
+
+    def _topic(self, name: str) -> dict:
+        key = name.lower()
+        if key not in self.topics:
+            self.topics[key] = next(self.next_local_id)
+        return {"id": self.topics[key], "name": name}
+
+    def parse(self, row: dict, prompt_id: int) -> dict:
+        text = (row.get("text") or row.get("prompt") or "").strip()
+        if not text:
+            raise ValueError("missing prompt text")
+        persona = self._persona((row.get("persona") or "General").strip())
         return SeedPrompt(
             id=prompt_id,
-            status="active",
-            text=prompt_texts[idx % len(prompt_texts)],
-            favorite=bool(idx % 2),
-            branded=False,
-            persona=make_persona(6500 + idx, persona_names[idx % len(persona_names)]),
-            category=categories[idx % len(categories)],
-            topics=make_topics(idx),
-            tags=["tag1", "tag2"],
-            last_updated="2025-07-31T13:23:51.585608Z",
-            created_at="2025-07-30T22:13:51.585608Z",
-            platforms=platform_list
-        )
+            status=(row.get("status") or "active").strip(),
+            text=text,
+            favorite=(row.get("favorite") or "").strip().lower() in TRUE_VALUES,
+            branded=(row.get("branded") or "").strip().lower() in TRUE_VALUES,
+            persona={"id": persona["id"], "name": persona["name"]},
+            category=(row.get("category") or "General").strip(),
+            topics=[self._topic(name) for name in _split_list(row.get("topics"))],
+            tags=_split_list(row.get("tags")),
+            last_updated=self.timestamp,
+            created_at=self.timestamp,
+            platforms=_split_list(row.get("platforms")) or PLATFORM_LIST,
+        ).dict()
 
-    # Generate 10 mock observations: each seed prompt for two different platforms (total 10)
-    observations = []
-    for i in range(5):  # Five seed prompts
-        seed_prompt = make_seed_prompt(131000 + i, i)
-        for j in range(2):  # Two platform observations per prompt
-            obs = Observation(
-                id=513800 + (i * 2 + j),
-                seed_prompt=seed_prompt,
-                platform=platform_list[(i + j) % len(platform_list)],
-                observation_count=10 + i * 5 + j,
-                created_at="2025-07-31T13:23:51.585608Z",
-                updated_at="2025-07-31T13:23:51.585608Z"
-            )
-            observations.append(obs)
+def ingest_prompt_csv(binary, project_id: str, project: dict) -> dict:
+    """Parse, validate and insert an uploaded CSV; runs in a worker thread.
 
-    # Support offset/limit pagination if needed
-    total = len(observations)
-    sliced = observations[offset: (offset + limit) if limit else None]
+    Valid rows are staged and inserted only once the whole file has parsed,
+    so an upload that is not UTF-8 (rejected by _iter_text_lines) or not CSV
+    fails with a 400 and leaves the store untouched.
+    """
+    started = time.perf_counter()
+    parser = PromptRowParser(project)
+    errors, failed, batches, batch = [], 0, [], []
+    rows = 0
+    try:
+        reader = csv.DictReader(_iter_text_lines(binary))
+        if not reader.fieldnames or not {"text", "prompt"} & {f.strip().lower() for f in reader.fieldnames}:
+            raise HTTPException(status_code=400, detail="CSV needs a header row with a 'text' or 'prompt' column")
+        for rows, raw in enumerate(reader, 1):
+            row = {(k or "").strip().lower(): v for k, v in raw.items()}
+            try:
+                batch.append(parser.parse(row, next(prompt_store.ids)))
+            except (ValueError, ValidationError) as exc:
+                failed += 1
+                if len(errors) < UPLOAD_MAX_ERRORS:
+                    errors.append({"row": rows, "error": str(exc)})
+                continue
+            if len(batch) >= UPLOAD_BATCH_ROWS:
+                batches.append(batch)
+                batch = []
+    except csv.Error as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed CSV near row {rows + 1}: {exc}")
+    if batch:
+        batches.append(batch)
+    inserted = 0
+    for batch in batches:
+        prompt_store.add_batch(project_id, batch)
+        inserted += len(batch)
+    elapsed = time.perf_counter() - started
+    return {
+        "status": "success" if not failed else "partial",
+        "rows": rows,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "errorsTruncated": failed > len(errors),
+        "stats": {
+            "bytes": binary.tell(),
+            "seconds": round(elapsed, 3),
+            "rowsPerSecond": round(rows / elapsed) if elapsed else rows,
+        },
+    }
 
-    return ObservationsResponse(
-        total=total,
-        offset=offset,
-        limit=limit,
-        observations=sliced
-    )
+@app.post("/api/Prompt/bulk-upload")
+async def bulk_upload_prompts(
+    file: UploadFile = File(...),
+    ContextId: str = Form(...),
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(ContextId, user_id)
+    # Starlette spools the upload to disk past 1 MB; parse that file in
+    # chunks on a worker thread so the event loop keeps serving requests.
+    return await run_in_threadpool(ingest_prompt_csv, file.file, ContextId, project)
+
+@app.get("/api/prompt/{projectId}")
+async def list_prompts(
+    projectId: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    await check_project_permission(projectId, user_id)
+    prompts = prompt_store.list(projectId)[offset: (offset + limit) if limit else None]
+    return json_payload([
+        {
+            "id": str(p["id"]),
+            "contextId": projectId,
+            "prompt": p["text"],
+            "tag": p["tags"][0] if p["tags"] else "",
+        }
+        for p in prompts
+    ])
 
 from typing import Dict
 
@@ -644,35 +2992,1573 @@ class PerfCompetitorGroup(BaseModel):
 # Dict[str, PerfCompetitorGroup] as response type
 PerfCompetitorPerfResponse = Dict[str, PerfCompetitorGroup]
 
+class CompetitorPerfMatrix:
+    """Observation x competitor mention counts for one project.
+
+    ``ordered`` is a flat row-major ``array('i')`` (one row per observation in
+    the catalogue) holding each observation's total mentions per competitor,
+    sorted count desc; ``order`` holds the matching competitor columns.
+    Mentions are spread over time like the project's daily responses on the
+    observation's platform, so a date range scales every row of that platform
+    by one factor taken from the series prefix sums. Scaling keeps each row's
+    ranking, so the response layout (JSON templates with the names in place,
+    plus the cells that fill them) depends only on (top, platform, sort) and
+    is built once; a query scales every cell through one lookup table and
+    formats each chunk of rows with a single ``%``.
+    """
+
+    MAX_LAYOUTS = 8
+    # Rows per formatted chunk: big enough that the per-chunk work is all in
+    # C, small enough that one ``%`` never holds the GIL for long
+    CHUNK_ROWS = 1024
+
+    def __init__(self, project_id: str, competitors: List[str], size: int):
+        rng = random.Random(f"{SERIES_SEED}:{project_id}:perf:{len(competitors)}:{size}")
+        draw = rng.random
+        self.competitors = competitors
+        self.width = width = len(competitors)
+        self.row_platforms = [observation_platform(n) for n in range(size)]
+        self.platform_names = sorted(set(self.row_platforms))
+        platform_ids = {name: i for i, name in enumerate(self.platform_names)}
+        self.row_platform_ids = array("i", [platform_ids[name] for name in self.row_platforms])
+        self.observation_counts = array("i", [rng.randint(10, 60) for _ in range(size)])
+        # Counts never exceed the observation count, so a scaled-count table
+        # of this length covers every cell
+        self.span = max(self.observation_counts, default=0) + 1
+        affinity = [rng.uniform(0.1, 1.0) for _ in competitors]
+        self.order = array("i")
+        self.ordered = array("i")
+        columns = range(width)
+        for total in self.observation_counts:
+            # rng.uniform(0.5, 1.5), inlined
+            row = [min(total, round(total * a * (0.5 + draw()))) for a in affinity]
+            order = sorted(columns, key=row.__getitem__, reverse=True)  # ties keep column order
+            self.order.extend(order)
+            self.ordered.extend([row[c] for c in order])
+        self.templates = {}  # keep -> per-row '"id":{...}' JSON templates
+        self.layouts = {}    # (keep, platform, sort) -> (body template, cell codes)
+
+    def __len__(self) -> int:
+        return len(self.row_platforms)
+
+    def row_templates(self, keep: int) -> List[bytes]:
+        templates = self.templates.get(keep)
+        if templates is None:
+            names = [
+                b'{"name":%s,"count":%%d}' % json.dumps(name, ensure_ascii=False).encode().replace(b"%", b"%%")
+                for name in self.competitors
+            ]
+            width, order = self.width, self.order
+            templates = self.templates[keep] = [
+                b'"%d":{"competitors":[' % (OBSERVATION_BASE_ID + n)
+                + b",".join([names[c] for c in order[base:base + keep]])
+                + b'],"observation_count":%d}'
+                for n, base in enumerate(range(0, len(self) * width, width))
+            ]
+        return templates
+
+    def rows(self, platform: Optional[str], sort: str) -> List[int]:
+        rows = [n for n, name in enumerate(self.row_platforms) if platform in (None, ALL_PLATFORMS, name)]
+        if sort == "count":
+            rows.sort(key=self.observation_counts.__getitem__, reverse=True)
+        return rows
+
+    def layout(self, keep: int, platform: Optional[str], sort: str):
+        """[(joined row templates, first cell, end cell)] chunks and the cell codes for one response shape.
+
+        A cell's code is ``platform id * span + count``: its index in the
+        concatenation of the per-platform scaled-count tables.
+        """
+        key = (keep, platform if platform != ALL_PLATFORMS else None, sort)
+        layout = self.layouts.get(key)
+        if layout is None:
+            rows = self.rows(platform, sort)
+            templates = self.row_templates(keep)
+            width, span, ordered, counts = self.width, self.span, self.ordered, self.observation_counts
+            codes = array("i")
+            chunks = []
+            for i in range(0, len(rows), self.CHUNK_ROWS):
+                first = len(codes)
+                for n in rows[i:i + self.CHUNK_ROWS]:
+                    offset = self.row_platform_ids[n] * span
+                    base = n * width
+                    codes.extend([offset + v for v in ordered[base:base + keep]])
+                    codes.append(offset + counts[n])
+                chunks.append((b",".join([templates[n] for n in rows[i:i + self.CHUNK_ROWS]]), first, len(codes)))
+            if len(self.layouts) >= self.MAX_LAYOUTS:
+                self.layouts.clear()
+            layout = self.layouts[key] = (chunks, codes)
+        return layout
+
+    def scaled_tables(self, series: "ProjectSeries", lo: int, hi: int) -> Dict[str, List[int]]:
+        """Platform -> [round(count * factor) for every count], for the date range [lo, hi)."""
+        tables = {}
+        for name in self.platform_names:
+            cumulative = series.prefix("responses", name if name in series.platforms else ALL_PLATFORMS)
+            factor = (cumulative[hi] - cumulative[lo]) / (cumulative[-1] or 1)
+            tables[name] = [round(v * factor) for v in range(self.span)]
+        return tables
+
+    def query(self, series: "ProjectSeries", lo: int, hi: int,
+              platform: Optional[str], top: Optional[int], sort: str) -> bytes:
+        """The response members ('"id":{...}' joined by commas), in response order."""
+        chunks, codes = self.layout(min(top, self.width) if top else self.width, platform, sort)
+        tables = self.scaled_tables(series, lo, hi)
+        scaled = [value for name in self.platform_names for value in tables[name]].__getitem__
+        return b",".join([template % tuple(map(scaled, codes[i:j])) for template, i, j in chunks])
+
+    def members(self, series: "ProjectSeries", lo: int, hi: int,
+                platform: Optional[str], top: Optional[int], sort: str) -> List[tuple]:
+        """Return (observation_count, encoded member) per row, for merging with other rows."""
+        tables = self.scaled_tables(series, lo, hi)
+        width, ordered, row_platforms, observation_counts = self.width, self.ordered, self.row_platforms, self.observation_counts
+        keep = min(top, width) if top else width
+        templates = self.row_templates(keep)
+        members = []
+        for n in self.rows(platform, sort):
+            scale = tables[row_platforms[n]]
+            base = n * width
+            count = scale[observation_counts[n]]
+            members.append((count, templates[n] % (*map(scale.__getitem__, ordered[base:base + keep]), count)))
+        return members
+
+# Matrices are cached per (project, competitors, scale) within a row budget,
+# like the observation catalogues, and built on a worker thread.
+PERF_MATRIX_CACHE_ROWS = int(os.environ.get("MOCK_PERF_MATRIX_CACHE_ROWS", "400000"))
+perf_matrices = BuildCache(PERF_MATRIX_CACHE_ROWS)  # (projectId, competitors, size) -> CompetitorPerfMatrix
+
+async def perf_matrix(project_id: str, competitors: List[str], size: int) -> CompetitorPerfMatrix:
+    return await perf_matrices.fetch(
+        (project_id, tuple(competitors), size), lambda: CompetitorPerfMatrix(project_id, competitors, size),
+    )
+
 @app.get("/api/{projectId}/prompt-competitor-perf", response_model=PerfCompetitorPerfResponse)
 async def get_prompt_competitor_perf(
     projectId: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    top: Optional[int] = Query(None, ge=1),
+    sort: str = Query("id", description="Row order: 'id' or 'count' (most observed first)"),
+    scale: int = Query(DEFAULT_OBSERVATION_SCALE, ge=1, le=MAX_OBSERVATION_SCALE),
     authorization: Optional[str] = Header(None)
 ):
-    user_id = get_userid_from_auth_header(authorization)
-    check_project_permission(projectId, user_id)
-
-    # Example mock data, can expand or generate as needed
-    result = {
-        "513800": {
-            "competitors": [
-                {"name": "Fivetran", "count": 26},
-                {"name": "Matillion", "count": 24},
-                {"name": "Airbyte", "count": 16},
-                {"name": "Talend", "count": 8},
-                {"name": "Stitch", "count": 2}
-            ],
-            "observation_count": 27
-        },
-        "513803": {
-            "competitors": [
-                {"name": "Talend", "count": 27},
-                {"name": "Fivetran", "count": 27},
-                {"name": "Matillion", "count": 27},
-                {"name": "Airbyte", "count": 14},
-                {"name": "Stitch", "count": 12}
-            ],
-            "observation_count": 27
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if sort not in ("id", "count"):
+        raise HTTPException(status_code=400, detail="sort must be 'id' or 'count'")
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    series = get_project_series(projectId)
+    series.columns(platform)  # rejects unknown platforms
+    start = parse_date_param(startDate, "startDate")
+    end = parse_date_param(endDate, "endDate")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="startDate must not be after endDate")
+    competitors = project_competitor_names(project)
+    matrix = await perf_matrix(projectId, competitors, scale)
+
+    def render():
+        # Full-width bodies run to tens of MB at large scales: encode and hash
+        # them here, on a worker thread, and under the series lock
+        with series.lock:
+            hi = series.anchor(end)
+            lo = bisect_left(series.days, start.toordinal(), 0, hi) if start else 0
+            rollups = observation_rollups.get(projectId)
+            ingested = rollups.query(
+                competitors, start and start.toordinal(), end and end.toordinal() + 1, platform, top,
+            ) if rollups else {}
+            return encode(lo, hi, ingested)
+
+    def encode(lo, hi, ingested):
+        if ingested and sort == "count":
+            # ingested rows interleave with generated ones by count
+            members = matrix.members(series, lo, hi, platform, top, sort)
+            members.extend(
+                (row["observation_count"], b'"%s":%s' % (key.encode(), _dump_json(row))) for key, row in ingested.items()
+            )
+            members.sort(key=lambda member: -member[0])
+            body = b",".join([member for _, member in members])
+        else:
+            body = matrix.query(series, lo, hi, platform, top, sort)
+            if ingested:
+                body = b",".join([part for part in (body, _dump_json(ingested)[1:-1]) if part])
+        body = b"{" + body + b"}"
+        return body, body_etag(body)
+
+    body, etag = await run_in_threadpool(render)
+    return cache_store(request, project, body, etag)
+
+# --- Prompt tag analysis ---
+
+class PresenceItem(BaseModel):
+    companyName: str
+    presenceCount: int
+    presencePercentage: float
+    isOwnCompany: bool
+
+class TagPresenceSummary(BaseModel):
+    tag: str
+    totalResponses: int
+    totalPrompts: int
+    presenceData: List[PresenceItem]
+
+class DayWisePresence(BaseModel):
+    date: str
+    totalResponses: int
+    ownPresenceCount: int
+    ownPresencePercentage: float
+
+class PromptPlatformPresence(BaseModel):
+    platform: str
+    totalResponses: int
+    ownPresenceCount: int
+    ownPresencePercentage: float
+    competitorPresence: List[PresenceItem]
+
+class PromptWiseAnalysis(BaseModel):
+    promptId: str
+    promptText: str
+    totalResponses: int
+    presenceData: List[PresenceItem]
+    dailyResponseData: Optional[List[DayWisePresence]] = None
+    platformWiseData: List[PromptPlatformPresence]
+
+class TagAnalysisResponse(BaseModel):
+    tag: str
+    totalPrompts: int
+    totalResponses: int
+    promptWiseAnalysis: List[PromptWiseAnalysis]
+    tagWiseDayWisePresence: List[DayWisePresence]
+
+def _intersect(a: array, b: array) -> array:
+    """Sorted intersection of two sorted position arrays, searching from the shorter."""
+    if len(a) > len(b):
+        a, b = b, a
+    out, lo, n = array("i"), 0, len(b)
+    for x in a:
+        lo = bisect_left(b, x, lo)
+        if lo == n:
+            break
+        if b[lo] == x:
+            out.append(x)
+    return out
+
+class PromptIndex:
+    """Inverted indexes over one project's seed prompts.
+
+    Prompts are numbered by position. ``postings`` maps ("tag" | "topic" |
+    "platform") -> lowercased key -> sorted ``array('i')`` of positions.
+    Prompts are only ever appended, so the index catches up by indexing the
+    new tail.
+
+    Each prompt also gets a deterministic response weight and own/competitor
+    presence biases, plus a bitmask of the platforms it runs on. A rollup over
+    any set of prompts is then one pass summing three arrays per platform
+    mask, scaled by the project's series. Sums for whole postings are memoized
+    until the next prompts arrive.
+    """
+
+    def __init__(self, project_id: str, source: List[dict]):
+        self.project_id = project_id
+        self.source = source
+        self.ids = array("q")
+        self.texts = []
+        self.by_id = {}     # prompt id -> position
+        self.postings = {"tag": {}, "topic": {}, "platform": {}}
+        self.labels = {}    # (kind, key) -> name as first seen
+        self.platform_bits = {}  # platform -> bit in masks
+        self.masks = []
+        self.weight = array("d")
+        self.own_weight = array("d")    # weight * own-mention bias
+        self.rival_weight = array("d")  # weight * competitor-mention bias
+        self.sums = {}      # posting key -> {platform: (sum w, sum own, sum rival)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend(self, prompts: List[dict]):
+        for prompt in prompts:
+            position = len(self.ids)
+            self.ids.append(prompt["id"])
+            self.texts.append(prompt["text"])
+            self.by_id[prompt["id"]] = position
+            for kind, names in (
+                ("tag", prompt["tags"]),
+                ("topic", [topic["name"] for topic in prompt["topics"]]),
+                ("platform", prompt["platforms"]),
+            ):
+                postings = self.postings[kind]
+                for key, name in {name.lower(): name for name in names}.items():
+                    postings.setdefault(key, array("i")).append(position)
+                    self.labels.setdefault((kind, key), name)
+            mask = 0
+            for name in prompt["platforms"]:
+                mask |= 1 << self.platform_bits.setdefault(name, len(self.platform_bits))
+            self.masks.append(mask)
+            h = zlib.crc32(f"{self.project_id}:{prompt['id']}".encode())
+            weight = 0.5 + (h & 1023) / 1023
+            self.weight.append(weight)
+            self.own_weight.append(weight * (0.6 + 0.45 * ((h >> 10) & 1023) / 1023))
+            self.rival_weight.append(weight * (0.6 + 0.45 * ((h >> 20) & 1023) / 1023))
+        self.sums.clear()
+
+    def select(self, kind: str, names: List[str]) -> array:
+        """Positions carrying every one of ``names``."""
+        postings = self.postings[kind]
+        lists = sorted((postings.get(name.lower(), array("i")) for name in names), key=len)
+        selected = lists[0]
+        for other in lists[1:]:
+            selected = _intersect(selected, other)
+        return selected
+
+    def totals(self, positions, key=None) -> Dict[str, tuple]:
+        """platform -> (sum weight, sum own weight, sum rival weight) over ``positions``.
+
+        ``positions=None`` means every prompt. Pass a hashable ``key`` naming a
+        whole posting to memoize the result.
+        """
+        if key is not None and key in self.sums:
+            return self.sums[key]
+        by_mask = {}
+        masks, weight, own, rival = self.masks, self.weight, self.own_weight, self.rival_weight
+        for p in range(len(masks)) if positions is None else positions:
+            sums = by_mask.get(masks[p])
+            if sums is None:
+                sums = by_mask[masks[p]] = [0.0, 0.0, 0.0]
+            sums[0] += weight[p]
+            sums[1] += own[p]
+            sums[2] += rival[p]
+        totals = {}
+        for name, bit in self.platform_bits.items():
+            sw = so = sr = 0.0
+            for mask, (w, o, r) in by_mask.items():
+                if mask >> bit & 1:
+                    sw, so, sr = sw + w, so + o, sr + r
+            totals[name] = (sw, so, sr)
+        if key is not None:
+            self.sums[key] = totals
+        return totals
+
+prompt_indexes = {}  # projectId -> PromptIndex
+
+@lru_cache(1)
+def default_seed_prompts() -> List[dict]:
+    # projects without uploads analyse the demo catalogue's seed prompts
+    return [make_seed_prompt(131000 + i, i).dict() for i in range(DEFAULT_OBSERVATION_SCALE // 2)]
+
+def get_prompt_index(project_id: str) -> PromptIndex:
+    prompts = prompt_store.list(project_id) or default_seed_prompts()
+    index = prompt_indexes.get(project_id)
+    if index is None or index.source is not prompts:
+        index = prompt_indexes[project_id] = PromptIndex(project_id, prompts)
+    if len(index) < len(prompts):
+        index.extend(prompts[len(index):])
+    return index
+
+class PromptPresence:
+    """Turns prompt-index totals into counts for one project, platform and date range.
+
+    A prompt's share of a platform's responses is its weight over the total
+    weight of prompts on that platform. Its own mentions scale the platform's
+    present count by its own bias. Competitor mentions scale each
+    competitor's overall mention rate by its rival bias.
+    """
+
+    def __init__(self, project: dict, index: PromptIndex, platform: Optional[str],
+                 startDate: Optional[str], endDate: Optional[str]):
+        series = get_project_series(project["id"])
+        series.columns(platform)  # rejects unknown platforms
+        lo, hi = series.window(parse_date_param(startDate, "startDate"), parse_date_param(endDate, "endDate"))
+        self.series, self.index, self.lo, self.hi = series, index, lo, hi
+        if platform and platform != ALL_PLATFORMS:
+            names = [platform]
+        else:
+            names = [name for name in series.platforms if name != ALL_PLATFORMS]
+        self.platforms = []  # (platform, responses, present, prompt weight on it)
+        everything = index.totals(None, key="all")
+        for name in names:
+            weight = everything.get(name, (0.0,))[0]
+            if weight:
+                responses, present = (series.prefix(column, name) for column in ("responses", "present"))
+                self.platforms.append((name, responses[hi] - responses[lo], present[hi] - present[lo], weight))
+        responses = series.prefix("responses")
+        all_responses = responses[hi] - responses[lo]
+        self.own_name = project["brandInfo"]["name"]
+        self.rivals = []
+        for name in project_competitor_names(project):
+            mentions = series.competitor_prefix(name)
+            self.rivals.append((name, (mentions[hi] - mentions[lo]) / all_responses if all_responses else 0.0))
+
+    def platform_counts(self, positions, key=None):
+        """Yield (platform, responses, own mentions, competitor weight) per platform."""
+        totals = self.index.totals(positions, key)
+        for name, responses, present, weight in self.platforms:
+            sw, so, sr = totals.get(name, (0.0, 0.0, 0.0))
+            yield name, responses * sw / weight, present * so / weight, responses * sr / weight
+
+    def presence_data(self, responses: float, present: float, rival: float) -> List[dict]:
+        total = round(responses)
+        items = [{
+            "companyName": self.own_name,
+            "presenceCount": round(present),
+            "presencePercentage": _pct(round(present), total),
+            "isOwnCompany": True,
+        }]
+        for name, rate in self.rivals:
+            mentions = round(rival * rate)
+            items.append({
+                "companyName": name,
+                "presenceCount": mentions,
+                "presencePercentage": _pct(mentions, total),
+                "isOwnCompany": False,
+            })
+        return items
+
+    def summary(self, positions, key=None):
+        responses = present = rival = 0.0
+        for _, r, p, c in self.platform_counts(positions, key):
+            responses, present, rival = responses + r, present + p, rival + c
+        return responses, present, rival
+
+    def daily(self, positions, key=None) -> List[dict]:
+        totals = self.index.totals(positions, key)
+        shares = []  # (platform columns, response share, own-mention share)
+        for name, _, _, weight in self.platforms:
+            sw, so, _ = totals.get(name, (0.0, 0.0, 0.0))
+            shares.append((self.series.platforms[name], sw / weight, so / weight))
+        days = []
+        for i in range(self.lo, self.hi):
+            responses = sum(columns["responses"][i] * share for columns, share, _ in shares)
+            present = sum(columns["present"][i] * share for columns, _, share in shares)
+            days.append({
+                "date": date.fromordinal(self.series.days[i]).isoformat(),
+                "totalResponses": round(responses),
+                "ownPresenceCount": round(present),
+                "ownPresencePercentage": _pct(round(present), round(responses)),
+            })
+        return days
+
+    def prompt(self, position: int, daily: bool = False) -> dict:
+        positions = array("i", [position])
+        platforms = []
+        responses = present = rival = 0.0
+        for name, r, p, c in self.platform_counts(positions):
+            if not r:
+                continue
+            responses, present, rival = responses + r, present + p, rival + c
+            platforms.append({
+                "platform": name,
+                "totalResponses": round(r),
+                "ownPresenceCount": round(p),
+                "ownPresencePercentage": _pct(round(p), round(r)),
+                "competitorPresence": self.presence_data(r, p, c)[1:],
+            })
+        return {
+            "promptId": str(self.index.ids[position]),
+            "promptText": self.index.texts[position],
+            "totalResponses": round(responses),
+            "presenceData": self.presence_data(responses, present, rival),
+            "dailyResponseData": self.daily(positions) if daily else None,
+            "platformWiseData": platforms,
         }
+
+def _names(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+@app.get("/api/PresenceSummary/prompt-analysis/tagwise/{projectId}", response_model=List[TagPresenceSummary])
+async def get_tagwise_presence(
+    projectId: str,
+    platform: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    groupBy: str = Query("tag", description="Roll up by 'tag' or 'topic'"),
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    if groupBy not in ("tag", "topic"):
+        raise HTTPException(status_code=400, detail="groupBy must be 'tag' or 'topic'")
+    index = get_prompt_index(projectId)
+
+    def build():
+        presence = PromptPresence(project, index, platform, startDate, endDate)
+        rows = []
+        for key, positions in index.postings[groupBy].items():
+            responses, present, rival = presence.summary(positions, key=(groupBy, key))
+            rows.append({
+                "tag": index.labels[groupBy, key],
+                "totalResponses": round(responses),
+                "totalPrompts": len(positions),
+                "presenceData": presence.presence_data(responses, present, rival),
+            })
+        return rows
+
+    return json_payload(await read_project_analytics(projectId, build))
+
+@app.get("/api/PresenceSummary/prompt-analysis/context/{projectId}/tag/{tag}", response_model=TagAnalysisResponse)
+async def get_tag_analysis(
+    projectId: str,
+    tag: str,
+    platform: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    topic: Optional[str] = Query(None, description="Comma-separated topics the prompts must also carry"),
+    limit: int = Query(100, ge=1, le=1000, description="Prompts listed, heaviest first"),
+    authorization: Optional[str] = Header(None),
+):
+    """One tag (or several, comma-separated, all required) with its heaviest prompts."""
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    tags = _names(tag)
+    if not tags:
+        raise HTTPException(status_code=400, detail="Empty tag")
+    index = get_prompt_index(projectId)
+    positions = index.select("tag", tags)
+    key = ("tag", tags[0].lower()) if len(tags) == 1 else None
+    if topic:
+        positions, key = _intersect(positions, index.select("topic", _names(topic))), None
+
+    def build():
+        presence = PromptPresence(project, index, platform, startDate, endDate)
+        responses, _, _ = presence.summary(positions, key)
+        heaviest = heapq.nlargest(limit, positions, key=index.weight.__getitem__)
+        return {
+            "tag": ", ".join(index.labels.get(("tag", name.lower()), name) for name in tags),
+            "totalPrompts": len(positions),
+            "totalResponses": round(responses),
+            "promptWiseAnalysis": [presence.prompt(position) for position in heaviest],
+            "tagWiseDayWisePresence": presence.daily(positions, key),
+        }
+
+    return json_payload(await read_project_analytics(projectId, build))
+
+@app.get("/api/PresenceSummary/prompt-analysis/prompt/{promptId}", response_model=PromptWiseAnalysis)
+async def get_prompt_analysis(
+    promptId: int,
+    contextId: Optional[str] = Query(None, description="Project id; needed for the demo seed prompts"),
+    platform: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project_id = contextId or prompt_store.owners.get(promptId)
+    if project_id is None:
+        raise HTTPException(status_code=404, detail=f"Unknown prompt: {promptId}")
+    project = await check_project_permission(project_id, user_id)
+    index = get_prompt_index(project_id)
+    position = index.by_id.get(promptId)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Unknown prompt: {promptId}")
+
+    def build():
+        return PromptPresence(project, index, platform, startDate, endDate).prompt(position, daily=True)
+
+    return json_payload(await read_project_analytics(project_id, build))
+
+# --- Citation analytics ---
+
+CITATION_DAYS = int(os.environ.get("MOCK_CITATION_DAYS", "90"))
+CITATION_TOP_K = 10
+THIRD_PARTY_DOMAINS = [
+    "wikipedia.org", "reddit.com", "medium.com", "g2.com", "gartner.com", "stackoverflow.com",
+    "github.com", "forbes.com", "techcrunch.com", "capterra.com", "towardsdatascience.com",
+    "dev.to", "news.ycombinator.com", "youtube.com", "linkedin.com", "aws.amazon.com",
+    "cloud.google.com", "learn.microsoft.com", "dbt.com", "trustradius.com",
+]
+CITATION_PATHS = ["", "pricing", "docs/getting-started", "blog/data-pipelines", "compare/etl-tools", "reviews"]
+BRAND, COMPETITOR, THIRD_PARTY = "brand", "competitor", "thirdParty"
+
+class CitationShare(BaseModel):
+    count: int
+    percentage: float
+
+class CitationBreakdown(BaseModel):
+    count: int
+    total: int
+    percentage: float
+
+class TopCitedDomain(BaseModel):
+    domain: str
+    count: int
+    percentage: float
+
+class DomainStats(BaseModel):
+    domain: str
+    promptCount: int
+    totalOccurrences: int
+
+class CitationStatsResponse(BaseModel):
+    totalCitations: int
+    ownBrand: CitationShare
+    thirdParty: CitationShare
+    competitors: CitationShare
+    topCitedDomains: List[TopCitedDomain]
+    domainWiseDetails: List[DomainStats]
+
+class DayWiseOwnBrand(BaseModel):
+    date: str
+    percentage: float
+
+class CitationResult(BaseModel):
+    totalCitations: int
+    ownBrandCitation: CitationBreakdown
+    thirdPartyCitation: CitationBreakdown
+    competitorCitation: CitationBreakdown
+    dayWiseOwnBrandData: List[DayWiseOwnBrand]
+    topCitedDomains: List[TopCitedDomain]
+
+def website_hosts(websites: str) -> List[str]:
+    """Hosts named in a free-text websites field, e.g. "a.com, https://www.b.io/x"."""
+    hosts = []
+    for item in re.split(r"[\s,;|]+", websites or ""):
+        host = item.split("://", 1)[-1].split("/", 1)[0].split(":", 1)[0].lower().strip(".")
+        if host.startswith("www."):
+            host = host[4:]
+        if "." in host:
+            hosts.append(host)
+    return hosts
+
+def _name_host(name: str) -> str:
+    # stand-in website for brands and competitors that list none
+    return re.sub(r"[^a-z0-9]", "", name.lower()) + ".com"
+
+def context_hosts(project: dict):
+    """(brand hosts, [(competitor name, hosts), ...]) from the project's context."""
+    brand = project["brandInfo"]
+    brand_hosts = website_hosts(brand.get("websites", "")) or [_name_host(brand["name"])]
+    competitors = list(context_items(project, "competitors").values()) or [{"name": n} for n in DEFAULT_COMPETITORS]
+    return brand_hosts, [
+        (c["name"], website_hosts(c.get("websites", "")) or [_name_host(c["name"])]) for c in competitors
+    ]
+
+class DomainClassifier:
+    """Host-suffix lookup table: a citation of docs.example.com matches example.com.
+
+    Built once per version of the brandInfo/competitors sections; lookups walk
+    the host's suffixes, so each costs O(labels) dict probes.
+    """
+
+    def __init__(self, project: dict):
+        self.table = {}
+        brand_hosts, competitors = context_hosts(project)
+        for _, hosts in competitors:
+            for host in hosts:
+                self.table.setdefault(host, COMPETITOR)
+        for host in brand_hosts:
+            self.table[host] = BRAND  # a site listed for both is the brand's
+
+    def classify(self, host: str) -> str:
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            kind = self.table.get(".".join(labels[i:]))
+            if kind:
+                return kind
+        return THIRD_PARTY
+
+class TopK:
+    """Top ``k`` keys by count, maintained under increments.
+
+    Counts only grow, so a key outside the top can only get in by overtaking
+    the weakest member: an increment costs O(k) at worst.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts = {}
+        self.members = set()
+
+    def add(self, key, amount: int = 1):
+        count = self.counts[key] = self.counts.get(key, 0) + amount
+        if key in self.members:
+            return
+        if len(self.members) < self.k:
+            self.members.add(key)
+            return
+        weakest = min(self.members, key=self.counts.__getitem__)
+        if count > self.counts[weakest]:
+            self.members.remove(weakest)
+            self.members.add(key)
+
+    def top(self) -> list:
+        return sorted(self.members, key=lambda key: -self.counts[key])
+
+class CitationStore:
+    """One project's citation records, stored column-wise.
+
+    Each record is (day ordinal, observation, prompt id, platform, host id,
+    url id); the host's brand/competitor/third-party class is looked up at
+    query time so context edits re-classify without touching records.
+    ``postings`` maps ("domain" | "url" | "prompt", id, platform or None) to
+    parallel (days, record ids) arrays kept sorted by day, so a range count
+    is two bisects; ``top`` keeps the all-time TopK of hosts per platform scope.
+    """
+
+    def __init__(self):
+        self.days = array("i")
+        self.observations = array("q")
+        self.prompts = array("q")
+        self.platforms = []
+        self.hosts = array("i")
+        self.urls = array("i")
+        self.host_names, self.host_ids = [], {}
+        self.url_names, self.url_ids = [], {}
+        self.url_host = array("i")
+        self.postings = {}
+        self.top = {}        # None | platform -> TopK of host ids
+        self.per_day = {}    # None | platform -> {day ordinal: citations}
+        self.classes = (None, [])  # (context versions, class per host id)
+
+    def __len__(self):
+        return len(self.days)
+
+    @staticmethod
+    def _intern(ids: dict, names: list, name: str) -> int:
+        ident = ids.get(name)
+        if ident is None:
+            ident = ids[name] = len(names)
+            names.append(name)
+        return ident
+
+    def add(self, day: int, observation: int, prompt: int, platform: str, url: str) -> int:
+        host = self._intern(self.host_ids, self.host_names, url.split("://", 1)[-1].split("/", 1)[0])
+        known = len(self.url_names)
+        url_id = self._intern(self.url_ids, self.url_names, url)
+        if url_id == known:
+            self.url_host.append(host)
+        record = len(self.days)
+        self.days.append(day)
+        self.observations.append(observation)
+        self.prompts.append(prompt)
+        self.platforms.append(platform)
+        self.hosts.append(host)
+        self.urls.append(url_id)
+        for key in (
+            ("domain", host, None), ("domain", host, platform), ("url", url_id, None), ("url", url_id, platform),
+            ("prompt", prompt, None), ("prompt", prompt, platform),
+        ):
+            days, records = self.postings.get(key) or self.postings.setdefault(key, (array("i"), array("i")))
+            if not days or days[-1] <= day:
+                days.append(day)
+                records.append(record)
+            else:  # backfilled day: O(n) insert, appends stay O(1)
+                i = bisect_right(days, day)
+                days.insert(i, day)
+                records.insert(i, record)
+        for scope in (None, platform):
+            self.top.setdefault(scope, TopK(CITATION_TOP_K)).add(host)
+            per_day = self.per_day.setdefault(scope, {})
+            per_day[day] = per_day.get(day, 0) + 1
+        return record
+
+    def host_classes(self, project: dict) -> List[str]:
+        versions = project.get("sectionVersions", {})
+        key = (versions.get("brandInfo", 0), versions.get("competitors", 0))
+        cached_key, classes = self.classes
+        if cached_key != key or len(classes) < len(self.host_names):
+            classifier = DomainClassifier(project)
+            classes = [classifier.classify(host) for host in self.host_names]
+            self.classes = (key, classes)
+        return classes
+
+    def window(self, start: Optional[date], end: Optional[date]):
+        """Day ordinals [lo, hi) for start..end; None when both are open (all time)."""
+        if start is None and end is None:
+            return None
+        lo = start.toordinal() if start else 0
+        hi = end.toordinal() + 1 if end else date.max.toordinal()
+        if lo >= hi:
+            raise HTTPException(status_code=400, detail="startDate must not be after endDate")
+        return lo, hi
+
+    def span(self, kind: str, ident: int, platform: Optional[str], window):
+        """(days, record ids, i, j): the posting and its slice inside ``window``."""
+        days, records = self.postings.get((kind, ident, platform), (array("i"), array("i")))
+        if window is None:
+            return days, records, 0, len(days)
+        return days, records, bisect_left(days, window[0]), bisect_left(days, window[1])
+
+    def count(self, kind: str, ident: int, platform: Optional[str], window) -> int:
+        _, _, i, j = self.span(kind, ident, platform, window)
+        return j - i
+
+    def host_counts(self, platform: Optional[str], window) -> Dict[int, int]:
+        """Citations per host id: maintained counters, or one bisect pair per host."""
+        if window is None:
+            top = self.top.get(platform)
+            return dict(top.counts) if top else {}
+        counts = {}
+        for host in range(len(self.host_names)):
+            n = self.count("domain", host, platform, window)
+            if n:
+                counts[host] = n
+        return counts
+
+    def top_hosts(self, counts: Dict[int, int], platform: Optional[str], window) -> List[int]:
+        if window is None and platform in self.top:
+            return self.top[platform].top()
+        return heapq.nlargest(CITATION_TOP_K, counts, key=counts.__getitem__)
+
+    def prompt_count(self, kind: str, ident: int, platform: Optional[str], window) -> int:
+        _, records, i, j = self.span(kind, ident, platform, window)
+        prompts = self.prompts
+        return len({prompts[r] for r in records[i:j]})
+
+    def prompt_records(self, prompt_ids, platform: Optional[str], window) -> List[int]:
+        """Record ids of the given prompts inside ``window``, via the per-prompt postings."""
+        out = []
+        for prompt in prompt_ids:
+            _, records, i, j = self.span("prompt", prompt, platform, window)
+            out.extend(records[i:j])
+        return out
+
+citation_stores = {}  # projectId -> CitationStore
+
+def generate_citations(project: dict) -> CitationStore:
+    """Deterministic citation records over the last CITATION_DAYS days."""
+    rng = random.Random(f"{SERIES_SEED}:{project['id']}:citations")
+    brand_hosts, competitors = context_hosts(project)
+    owned = brand_hosts + ["docs." + brand_hosts[0]]
+    for _, hosts in competitors:
+        owned += hosts + ["blog." + hosts[0]]
+    hosts = THIRD_PARTY_DOMAINS + owned
+    # long-tailed popularity: a few domains collect most citations
+    weights = [1 / (rank + 1) for rank in range(len(hosts))]
+    rng.shuffle(weights)
+    prompts = get_prompt_index(project["id"]).ids
+    store = CitationStore()
+    observation = OBSERVATION_BASE_ID
+    end = SERIES_END.toordinal()
+    for day in range(end - CITATION_DAYS + 1, end + 1):
+        for platform in SERIES_PLATFORMS:
+            for _ in range(rng.randint(3, 12)):
+                observation += 1
+                prompt = prompts[rng.randrange(len(prompts))]
+                for host in rng.choices(hosts, weights, k=rng.randint(1, 4)):
+                    store.add(day, observation, prompt, platform, f"https://{host}/{rng.choice(CITATION_PATHS)}")
+    return store
+
+def get_citation_store(project: dict) -> CitationStore:
+    store = citation_stores.get(project["id"])
+    if store is None:
+        store = citation_stores[project["id"]] = generate_citations(project)
+    return store
+
+def citation_scope(platform: Optional[str]) -> Optional[str]:
+    if not platform or platform == ALL_PLATFORMS:
+        return None
+    if platform not in SERIES_PLATFORMS:
+        raise HTTPException(status_code=400, detail=f"Unknown platform: {platform}")
+    return platform
+
+def citation_splits(classes: List[str], counts: Dict[int, int]) -> Dict[str, int]:
+    splits = {BRAND: 0, COMPETITOR: 0, THIRD_PARTY: 0}
+    for host, n in counts.items():
+        splits[classes[host]] += n
+    return splits
+
+def top_cited(store: CitationStore, hosts: List[int], counts: Dict[int, int], total: int) -> List[dict]:
+    return [
+        {"domain": store.host_names[h], "count": counts[h], "percentage": _pct(counts[h], total)}
+        for h in hosts
+    ]
+
+def build_citation_dashboard(
+    project: dict,
+    groupBy: str,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    limit: int = 50,
+) -> dict:
+    if groupBy not in ("domain", "url"):
+        raise HTTPException(status_code=400, detail="groupBy must be 'domain' or 'url'")
+    store = get_citation_store(project)
+    scope = citation_scope(platform)
+    window = store.window(parse_date_param(startDate, "startDate"), parse_date_param(endDate, "endDate"))
+    counts = store.host_counts(scope, window)
+    total = sum(counts.values())
+    splits = citation_splits(store.host_classes(project), counts)
+    if groupBy == "domain":
+        detail_counts = counts
+        names = store.host_names
+    else:
+        detail_counts = {}
+        for url in range(len(store.url_names)):
+            n = store.count("url", url, scope, window)
+            if n:
+                detail_counts[url] = n
+        names = store.url_names
+    details = heapq.nlargest(limit, detail_counts, key=detail_counts.__getitem__)
+    return {
+        "totalCitations": total,
+        "ownBrand": {"count": splits[BRAND], "percentage": _pct(splits[BRAND], total)},
+        "thirdParty": {"count": splits[THIRD_PARTY], "percentage": _pct(splits[THIRD_PARTY], total)},
+        "competitors": {"count": splits[COMPETITOR], "percentage": _pct(splits[COMPETITOR], total)},
+        "topCitedDomains": top_cited(store, store.top_hosts(counts, scope, window), counts, total),
+        "domainWiseDetails": [
+            {
+                "domain": names[ident],
+                "promptCount": store.prompt_count(groupBy, ident, scope, window),
+                "totalOccurrences": detail_counts[ident],
+            }
+            for ident in details
+        ],
+    }
+
+def build_citation_stats(
+    project: dict,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    tag: Optional[str] = None,
+    promptId: Optional[int] = None,
+) -> dict:
+    store = get_citation_store(project)
+    scope = citation_scope(platform)
+    window = store.window(parse_date_param(startDate, "startDate"), parse_date_param(endDate, "endDate"))
+    classes = store.host_classes(project)
+    day_totals, day_brand = {}, {}
+    if tag is None and promptId is None:
+        counts = store.host_counts(scope, window)
+        for host, kind in enumerate(classes):
+            if kind != BRAND:
+                continue
+            days, _, i, j = store.span("domain", host, scope, window)
+            for day in days[i:j]:
+                day_brand[day] = day_brand.get(day, 0) + 1
+        for day, n in store.per_day.get(scope, {}).items():
+            if window is None or window[0] <= day < window[1]:
+                day_totals[day] = n
+    else:
+        prompt_ids = set()
+        if tag is not None:
+            index = get_prompt_index(project["id"])
+            prompt_ids.update(index.ids[position] for position in index.select("tag", _names(tag)))
+        if promptId is not None:
+            prompt_ids = prompt_ids & {promptId} if tag is not None else {promptId}
+        counts = {}
+        for record in store.prompt_records(prompt_ids, scope, window):
+            host, day = store.hosts[record], store.days[record]
+            counts[host] = counts.get(host, 0) + 1
+            day_totals[day] = day_totals.get(day, 0) + 1
+            if classes[host] == BRAND:
+                day_brand[day] = day_brand.get(day, 0) + 1
+    total = sum(counts.values())
+    splits = citation_splits(classes, counts)
+    unfiltered = tag is None and promptId is None
+    return {
+        "totalCitations": total,
+        "ownBrandCitation": {"count": splits[BRAND], "total": total, "percentage": _pct(splits[BRAND], total)},
+        "thirdPartyCitation": {
+            "count": splits[THIRD_PARTY], "total": total, "percentage": _pct(splits[THIRD_PARTY], total),
+        },
+        "competitorCitation": {
+            "count": splits[COMPETITOR], "total": total, "percentage": _pct(splits[COMPETITOR], total),
+        },
+        "dayWiseOwnBrandData": [
+            {"date": date.fromordinal(day).isoformat(), "percentage": _pct(day_brand.get(day, 0), n)}
+            for day, n in sorted(day_totals.items())
+        ],
+        "topCitedDomains": top_cited(
+            store,
+            store.top_hosts(counts, scope, window) if unfiltered
+            else heapq.nlargest(CITATION_TOP_K, counts, key=counts.__getitem__),
+            counts, total,
+        ),
+    }
+
+@app.get("/api/Citation/context/{projectId}/dashboard/{groupBy}", response_model=CitationStatsResponse)
+async def get_citation_dashboard(
+    projectId: str,
+    groupBy: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000, description="Rows in domainWiseDetails, most cited first"),
+    authorization: Optional[str] = Header(None),
+):
+    """Brand/competitor/third-party split plus per-domain (or per-URL) rows; no dates means all time."""
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_citation_dashboard, project, groupBy, startDate, endDate, platform, limit)
+    return cache_store(request, project, payload)
+
+@app.get("/api/Citation/context/{projectId}/domain/{domain}", response_model=List[DomainStats])
+async def get_citation_domain(
+    projectId: str,
+    domain: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+):
+    """Cited URLs on a domain and its subdomains."""
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    domain = (website_hosts(domain) or [domain.lower()])[0]
+    suffix = "." + domain
+
+    def build():
+        store = get_citation_store(project)
+        scope = citation_scope(platform)
+        window = store.window(parse_date_param(startDate, "startDate"), parse_date_param(endDate, "endDate"))
+        hosts = {h for h, name in enumerate(store.host_names) if name == domain or name.endswith(suffix)}
+        rows = []
+        for url, host in enumerate(store.url_host):
+            if host in hosts:
+                n = store.count("url", url, scope, window)
+                if n:
+                    rows.append({
+                        "domain": store.url_names[url],
+                        "promptCount": store.prompt_count("url", url, scope, window),
+                        "totalOccurrences": n,
+                    })
+        rows.sort(key=lambda row: -row["totalOccurrences"])
+        return rows
+
+    payload = await read_project_analytics(projectId, build)
+    return cache_store(request, project, payload)
+
+@app.get("/api/Citation/context/{projectId}/stats", response_model=CitationResult)
+async def get_citation_stats(
+    projectId: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    platform: Optional[str] = None,
+    tag: Optional[str] = None,
+    promptId: Optional[int] = None,
+    authorization: Optional[str] = Header(None),
+):
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    cached = cache_lookup(request, project)
+    if cached:
+        return cached
+    payload = await read_project_analytics(projectId, build_citation_stats, project, startDate, endDate, platform, tag, promptId)
+    return cache_store(request, project, payload)
+
+# --- Observation ingestion ---
+
+MAX_INGEST_RECORDS = 10_000
+INGESTED_OBSERVATION_BASE_ID = 3_000_000
+POSITION_TOP_RANK = 1      # rank 1 counts as "top"
+POSITION_MIDDLE_RANK = 3   # ranks 2-3 "middle", anything lower "bottom"
+
+class IngestRecord(BaseModel):
+    promptId: int
+    platform: str
+    date: Optional[str] = None            # ISO date; defaults to today
+    brandPosition: Optional[int] = None   # 1-based rank of the brand in the answer, None if absent
+    competitors: List[str] = []           # competitor names mentioned
+    sources: List[str] = []               # cited URLs
+
+class ObservationRollups:
+    """Per-(prompt, platform) observation rows built from ingested records.
+
+    Each row keeps running totals and per-day buckets of
+    {None: responses, competitor name: mentions}; an all-time read uses the
+    totals and a date range sums only that row's buckets inside it.
+    """
+
+    def __init__(self):
+        self.rows = {}        # (prompt id, platform) -> row
+        self.platforms = []
+        self.totals = []
+        self.daily = []
+
+    def __len__(self):
+        return len(self.platforms)
+
+    def add(self, prompt: int, platform: str, day: int, competitors: List[str]) -> int:
+        row = self.rows.get((prompt, platform))
+        if row is None:
+            row = self.rows[prompt, platform] = len(self.platforms)
+            self.platforms.append(platform)
+            self.totals.append({})
+            self.daily.append({})
+        for counts in (self.totals[row], self.daily[row].setdefault(day, {})):
+            counts[None] = counts.get(None, 0) + 1
+            for name in competitors:
+                counts[name] = counts.get(name, 0) + 1
+        return INGESTED_OBSERVATION_BASE_ID + row
+
+    def query(self, competitors: List[str], lo: Optional[int], hi: Optional[int],
+              platform: Optional[str], top: Optional[int]) -> dict:
+        """prompt-competitor-perf rows for day ordinals [lo, hi); None bounds are open."""
+        keep = min(top, len(competitors)) if top else len(competitors)
+        result = {}
+        for row, row_platform in enumerate(self.platforms):
+            if platform not in (None, ALL_PLATFORMS, row_platform):
+                continue
+            if lo is None and hi is None:
+                counts = self.totals[row]
+            else:
+                counts = {}
+                for day, bucket in self.daily[row].items():
+                    if (lo is None or day >= lo) and (hi is None or day < hi):
+                        for name, n in bucket.items():
+                            counts[name] = counts.get(name, 0) + n
+            if not counts.get(None):
+                continue
+            ranked = sorted(competitors, key=lambda name: -counts.get(name, 0))[:keep]
+            result[str(INGESTED_OBSERVATION_BASE_ID + row)] = {
+                "competitors": [{"name": name, "count": counts.get(name, 0)} for name in ranked],
+                "observation_count": counts[None],
+            }
+        return result
+
+observation_rollups = {}  # projectId -> ObservationRollups
+
+def get_observation_rollups(project_id: str) -> ObservationRollups:
+    rollups = observation_rollups.get(project_id)
+    if rollups is None:
+        rollups = observation_rollups[project_id] = ObservationRollups()
+    return rollups
+
+def position_column(rank: Optional[int]) -> Optional[str]:
+    if rank is None:
+        return None
+    if rank <= POSITION_TOP_RANK:
+        return "top"
+    return "middle" if rank <= POSITION_MIDDLE_RANK else "bottom"
+
+def validate_ingest(project: dict, records: List[IngestRecord], series: ProjectSeries) -> List[int]:
+    """Day ordinal per record; rejects the whole batch on the first bad record."""
+    index = get_prompt_index(project["id"])
+    latest = max(date.today().toordinal(), series.days[-1])
+    days = []
+    for n, record in enumerate(records):
+        day = parse_date_param(record.date, f"records[{n}].date") or date.today()
+        problem = None
+        if record.platform not in SERIES_PLATFORMS:
+            problem = f"unknown platform {record.platform}"
+        elif record.promptId not in index.by_id:
+            problem = f"unknown prompt {record.promptId}"
+        elif record.brandPosition is not None and record.brandPosition < 1:
+            problem = "brandPosition must be 1 or more"
+        elif not series.days[0] <= day.toordinal() <= latest:
+            problem = f"date {day} is outside {date.fromordinal(series.days[0])}..{date.fromordinal(latest)}"
+        if problem:
+            raise HTTPException(status_code=400, detail=f"records[{n}]: {problem}")
+        days.append(day.toordinal())
+    return days
+
+def ingest_observations(project: dict, records: List[IngestRecord]) -> dict:
+    """Fold a batch into every materialized rollup the dashboards read.
+
+    Records go into the citation store (citation analytics) and the
+    observation rows (prompt-competitor-perf) one by one. Series deltas are
+    summed per (day, platform) and competitor mentions per (name, day), then
+    applied once each to the series columns and their cached prefixes
+    (presence, position, citations, tag analysis, competitor presence).
+    Returns those sums, which are also the batch's live-update delta.
+
+    Runs on a worker thread, holding the series lock for the whole batch:
+    reads see all of a batch or none of it.
+    """
+    series = get_project_series(project["id"])
+    with series.lock:
+        return _ingest_locked(project, records, series)
+
+def _ingest_locked(project: dict, records: List[IngestRecord], series: ProjectSeries) -> dict:
+    days = validate_ingest(project, records, series)
+    store = get_citation_store(project)
+    rollups = get_observation_rollups(project["id"])
+    series_deltas, mentions = {}, {}
+    for record, day in zip(records, days):
+        observation = rollups.add(record.promptId, record.platform, day, record.competitors)
+        deltas = series_deltas.get((day, record.platform))
+        if deltas is None:
+            deltas = series_deltas[day, record.platform] = dict.fromkeys(SERIES_COLUMNS, 0)
+        deltas["responses"] += 1
+        deltas["sources"] += len(record.sources)
+        for url in record.sources:
+            host = store.hosts[store.add(day, observation, record.promptId, record.platform, url)]
+            kind = store.host_classes(project)[host]
+            if kind == BRAND:
+                deltas["brand_sources"] += 1
+            elif kind == COMPETITOR:
+                deltas["competitor_sources"] += 1
+        column = position_column(record.brandPosition)
+        if column:
+            deltas["present"] += 1
+            deltas[column] += 1
+        for name in set(record.competitors):
+            mentions[name, day] = mentions.get((name, day), 0) + 1
+    for (day, platform), deltas in series_deltas.items():
+        series.add(platform, day, deltas)
+    for (name, day), count in mentions.items():
+        series.add_mentions(name, day, count)
+    return {
+        "accepted": len(records),
+        "series": [
+            {"date": date.fromordinal(day).isoformat(), "platform": platform, **deltas}
+            for (day, platform), deltas in sorted(series_deltas.items())
+        ],
+        "competitors": [
+            {"date": date.fromordinal(day).isoformat(), "name": name, "mentions": count}
+            for (name, day), count in sorted(mentions.items(), key=lambda item: (item[0][1], item[0][0]))
+        ],
+    }
+
+def parse_ingest_batch(body: bytes) -> List[IngestRecord]:
+    try:
+        items = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of records")
+    if len(items) > MAX_INGEST_RECORDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_INGEST_RECORDS} records per batch")
+    records = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=422, detail=f"records[{i}]: expected an object")
+        try:
+            records.append(IngestRecord(**item))
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=f"records[{i}]: {exc}")
+    return records
+
+# The body is a List[IngestRecord], parsed by hand: decoding and validating
+# 10k records takes ~100 ms, which belongs on the worker thread with the rest
+# of the batch rather than on the event loop.
+@app.post(
+    "/api/observations/ingest/{projectId}",
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": IngestRecord.schema()}},
+    }}},
+)
+async def ingest_observation_batch(
+    projectId: str,
+    request: Request,
+    authorization: Optional[str] = Header(None),
+):
+    """Append LLM observations; every dashboard read reflects them immediately."""
+    user_id = await get_userid_from_auth_header(authorization)
+    project = await check_project_permission(projectId, user_id)
+    body = await request.body()
+
+    def ingest():
+        return ingest_observations(project, parse_ingest_batch(body))
+
+    with timed_phase("rollup"):
+        delta = await run_in_threadpool(ingest)
+    response_cache.invalidate_project(projectId)
+    publish_project_event(projectId, "observations", delta)
+    return {
+        "accepted": delta["accepted"],
+        "observations": len(observation_rollups[projectId]),
+        "citations": len(citation_stores[projectId]),
     }
-    return result
+
+# --- Live updates ---
+
+LIVE_QUEUE_SIZE = int(os.environ.get("MOCK_LIVE_QUEUE_SIZE", "64"))
+LIVE_HEARTBEAT = 15.0  # seconds between keep-alive comments on an idle stream
+# seconds between checks of a shared (sqlite/sharded) store for other workers' context edits
+LIVE_STORE_POLL = float(os.environ.get("MOCK_LIVE_STORE_POLL", "1.0"))
+
+def _sse_frame(sequence: int, event: str, data) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (sequence, event.encode(), _dump_json(data))
+
+class LiveSubscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(LIVE_QUEUE_SIZE)
+        self.dropped = False
+
+class ProjectBroadcaster:
+    """Fans one project's events out to its Server-Sent Events subscribers.
+
+    Each event is encoded once and the same frame goes into every
+    subscriber's bounded queue, so publishing never awaits. A subscriber whose
+    queue is full has fallen behind: its backlog is replaced by a final
+    ``dropped`` frame and it is unsubscribed, so a slow client neither holds
+    memory nor delays the others.
+
+    Broadcasters are per process. On a shared store each one also polls the
+    project's section versions, so context edits committed by other workers
+    reach its subscribers too; ``sections`` remembers the versions already
+    announced, so an edit is sent once whichever worker saw it first.
+    """
+
+    dropped_total = 0
+
+    def __init__(self, project_id: str, sections: Dict[str, int]):
+        self.project_id = project_id
+        self.subscribers = set()
+        self.sequence = 0
+        self.sections = dict(sections)
+        self.poller = None
+
+    def subscribe(self) -> LiveSubscriber:
+        subscriber = LiveSubscriber()
+        self.subscribers.add(subscriber)
+        if self.poller is None and STORAGE_BACKEND != "memory":
+            self.poller = asyncio.get_running_loop().create_task(self._poll_store())
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers:
+            if self.poller is not None:
+                self.poller.cancel()
+                self.poller = None
+            if live_broadcasters.get(self.project_id) is self:
+                del live_broadcasters[self.project_id]
+
+    def publish_sections(self, versions: Dict[str, int]):
+        changed = {s: v for s, v in versions.items() if v > self.sections.get(s, 0)}
+        if changed:
+            self.sections.update(changed)
+            self.publish("context", {"sections": changed})
+
+    async def _poll_store(self):
+        while True:
+            await asyncio.sleep(LIVE_STORE_POLL)
+            try:
+                project = await run_store(project_store.get, self.project_id)
+            except sqlite3.Error:
+                continue  # busy store; try again on the next tick
+            if project is not None:
+                self.publish_sections(project.get("sectionVersions", {}))
+
+    def publish(self, event: str, data):
+        self.sequence += 1
+        frame = _sse_frame(self.sequence, event, data)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: LiveSubscriber):
+        ProjectBroadcaster.dropped_total += 1
+        self.unsubscribe(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(_sse_frame(self.sequence, "dropped", {"reason": "slow consumer"}))
+        subscriber.dropped = True
+
+live_broadcasters = {}  # projectId -> ProjectBroadcaster, while it has subscribers
+
+def publish_project_event(project_id: str, event: str, data):
+    broadcaster = live_broadcasters.get(project_id)
+    if broadcaster is None:
+        return
+    if event == "context":
+        broadcaster.publish_sections(data["sections"])
+    else:
+        broadcaster.publish(event, data)
+
+@app.get("/api/live/{projectId}")
+async def live_updates(
+    projectId: str,
+    token: Optional[str] = Query(None, description="Bearer token, for EventSource clients that cannot set headers"),
+    authorization: Optional[str] = Header(None),
+):
+    """Server-Sent Events for one project, in place of polling its dashboards.
+
+    Events: ``hello`` (current section versions), ``context`` (sections
+    edited, with their new versions), ``observations`` (per day/platform
+    series deltas and competitor mentions from an ingest batch) and, for a
+    client that fell behind, a final ``dropped``.
+
+    ``context`` events cover edits made on any worker sharing a sqlite or
+    sharded store (picked up within MOCK_LIVE_STORE_POLL seconds).
+    Observation series live in the worker that ingested them, so
+    ``observations`` events only reach subscribers connected to that worker.
+    """
+    user_id = await get_userid_from_auth_header(authorization or (token and f"Bearer {token}"))
+    project = await check_project_permission(projectId, user_id)
+    broadcaster = live_broadcasters.get(projectId)
+    if broadcaster is None:
+        broadcaster = live_broadcasters[projectId] = ProjectBroadcaster(projectId, project.get("sectionVersions", {}))
+    subscriber = broadcaster.subscribe()
+    hello = _sse_frame(broadcaster.sequence, "hello", {
+        "projectId": projectId, "sections": project.get("sectionVersions", {}),
+    })
+
+    async def stream():
+        try:
+            yield hello
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield frame
+                if subscriber.dropped and subscriber.queue.empty():
+                    return
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- Snapshots ---
+
+# Layout: MAGIC | section blobs | footer JSON | footer length (u64 LE) | MAGIC.
+# The footer indexes every section by offset/length. Arrays are stored raw in
+# native byte order, so sections map straight onto the file without parsing.
+SNAPSHOT_MAGIC = b"VISNAP01"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = os.environ.get("MOCK_SNAPSHOT")
+
+class MappedRows:
+    """Read-only sequence of JSON rows sliced out of a mapped snapshot."""
+
+    def __init__(self, buffer: memoryview, offsets: memoryview):
+        self.buffer = buffer
+        self.offsets = offsets  # len(rows) + 1 int64 boundaries
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def write_snapshot(path: str, catalogue_sizes: List[int] = ()) -> dict:
+    """Write users, projects, prompts, every generated series and the given catalogues."""
+    sections = {}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(SNAPSHOT_MAGIC)
+
+        def add(name: str, payload: bytes, **meta):
+            sections[name] = {"offset": out.tell(), "length": len(payload), **meta}
+            out.write(payload)
+            out.write(b"\0" * (-out.tell() % 8))  # keep arrays 8-byte aligned
+
+        add("users", json.dumps(user_store.all()).encode())
+        add("projects", json.dumps(list(project_store.all().values())).encode())
+        add("prompts", json.dumps(prompt_store.prompts).encode())
+        for project_id, series in series_store.items():
+            platforms = list(series.platforms)
+            blob = series.days.tobytes() + b"".join(
+                series.platforms[platform][column].tobytes()
+                for platform in platforms for column in SERIES_COLUMNS
+            )
+            add(f"series:{project_id}", blob, days=len(series.days), platforms=platforms)
+        for size in catalogue_sizes:
+            rows = get_observation_catalogue(size).rows
+            offsets = array("q", [0])
+            for row in rows:
+                offsets.append(offsets[-1] + len(row))
+            add(f"catalogue-offsets:{size}", offsets.tobytes())
+            add(f"catalogue:{size}", b"".join(rows), rows=len(rows))
+        footer = json.dumps({
+            "version": SNAPSHOT_VERSION,
+            "byteorder": sys.byteorder,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "seriesColumns": list(SERIES_COLUMNS),
+            "sections": sections,
+        }).encode()
+        out.write(footer)
+        out.write(struct.pack("<Q", len(footer)))
+        out.write(SNAPSHOT_MAGIC)
+    os.replace(tmp_path, path)
+    return sections
+
+class Snapshot:
+    """A snapshot file mapped into memory; sections are decoded on first use."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+        if self.mm[:8] != SNAPSHOT_MAGIC or self.mm[-8:] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        (footer_len,) = struct.unpack("<Q", self.mm[-16:-8])
+        self.footer = json.loads(self.mm[-16 - footer_len:-16])
+        if self.footer["version"] != SNAPSHOT_VERSION or self.footer["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by an incompatible snapshot version or platform")
+        self.sections = self.footer["sections"]
+
+    def _section(self, name: str) -> memoryview:
+        meta = self.sections[name]
+        return self.view[meta["offset"]:meta["offset"] + meta["length"]]
+
+    def load_json(self, name: str):
+        return json.loads(self._section(name).tobytes())
+
+    def load_series(self, project_id: str) -> Optional[ProjectSeries]:
+        name = f"series:{project_id}"
+        if name not in self.sections:
+            return None
+        meta, blob = self.sections[name], self._section(name)
+        width = 4 * meta["days"]
+        days = array("i")
+        days.frombytes(blob[:width])
+        platforms, position = {}, width
+        for platform in meta["platforms"]:
+            platforms[platform] = {}
+            for column in self.footer["seriesColumns"]:
+                values = array("i")
+                values.frombytes(blob[position:position + width])
+                platforms[platform][column] = values
+                position += width
+        return ProjectSeries.from_columns(project_id, days, platforms)
+
+    def catalogue_sizes(self) -> List[int]:
+        return [int(name.split(":")[1]) for name in self.sections if name.startswith("catalogue:")]
+
+    def load_catalogue(self, size: int) -> ObservationCatalogue:
+        offsets = self._section(f"catalogue-offsets:{size}").cast("q")
+        return ObservationCatalogue.from_rows(MappedRows(self._section(f"catalogue:{size}"), offsets))
+
+    def describe(self) -> dict:
+        return {
+            "path": self.path,
+            "bytes": len(self.mm),
+            "created": self.footer["created"],
+            "sections": {name: meta["length"] for name, meta in self.sections.items()},
+        }
+
+active_snapshot = None
+
+def load_snapshot(path: str) -> Snapshot:
+    """Map a snapshot and restore users/projects/prompts; series and
+    catalogues stay in the mapped file until a request needs them."""
+    global active_snapshot
+    snapshot = Snapshot(path)
+    # skip records a persistent backend already holds from an earlier start
+    for user in snapshot.load_json("users"):
+        if user_store.get(user["id"]) is None:
+            user_store.add(user)
+    for project in snapshot.load_json("projects"):
+        if project_store.get(project["id"]) is None:
+            project_store.add(project)
+    last_prompt_id = UPLOADED_PROMPT_BASE_ID - 1
+    for project_id, prompts in snapshot.load_json("prompts").items():
+        prompt_store.add_batch(project_id, prompts)
+        last_prompt_id = max([last_prompt_id] + [p["id"] for p in prompts])
+    prompt_store.ids = count(last_prompt_id + 1)
+    active_snapshot = snapshot
+    return snapshot
+
+if SNAPSHOT_PATH:
+    load_snapshot(SNAPSHOT_PATH)
@@ -0,0 +1,110 @@
+"""Create and inspect mock dataset snapshots.
+
+Usage:
+    python snapshot.py create fixture.snap --users 50 --projects-per-user 4 --observations 1000000
+    python snapshot.py inspect fixture.snap --load
+
+Start the mock with MOCK_SNAPSHOT=fixture.snap to serve the snapshot instead
+of reseeding through the HTTP API.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def create(args):
+    # Seed into a fresh in-memory store, never into a running backend
+    os.environ["MOCK_STORAGE"] = "memory"
+    os.environ.pop("MOCK_SNAPSHOT", None)
+    import main
+
+    started = time.perf_counter()
+    hasher = main.password_hasher
+    for u in range(args.users):
+        user_id = str(uuid4())
+        main.user_store.add({
+            "id": user_id,
+            "email": f"user{u}@example.com",
+            "fullName": f"User {u}",
+            "password": main.compute_password_hash(args.password, hasher.scheme, hasher.params),
+        })
+        for p in range(args.projects_per_user):
+            project_id = str(uuid4())
+            main.project_store.add({
+                "id": project_id,
+                "userId": user_id,
+                "brandInfo": main.BrandInfo(id=project_id, name=f"Brand {u}-{p}", websites=f"brand{u}-{p}.com").dict(),
+                "personas": [
+                    main.Persona(id=i, name=main.PERSONA_NAMES[i % len(main.PERSONA_NAMES)]).dict()
+                    for i in range(args.personas)
+                ],
+                "competitors": [
+                    main.Competitor(name=f"Competitor {i}", websites=f"competitor{i}.com").dict()
+                    for i in range(args.competitors)
+                ],
+                "topics": [main.Topic(id=i, name=f"Topic {i}").dict() for i in range(args.topics)],
+            })
+            if args.series:
+                main.get_project_series(project_id)
+    sizes = [args.observations] if args.observations else []
+    sections = main.write_snapshot(args.path, sizes)
+    print(json.dumps({
+        "path": args.path,
+        "bytes": os.path.getsize(args.path),
+        "sections": len(sections),
+        "seconds": round(time.perf_counter() - started, 2),
+        "login": {"email": "user0@example.com", "password": args.password} if args.users else None,
+    }, indent=2))
+
+
+def inspect(args):
+    os.environ["MOCK_STORAGE"] = "memory"
+    os.environ.pop("MOCK_SNAPSHOT", None)
+    import main
+
+    if args.load:
+        started = time.perf_counter()
+        snapshot = main.load_snapshot(args.path)
+        info = snapshot.describe()
+        info["loadSeconds"] = round(time.perf_counter() - started, 4)
+        info["users"] = len(main.user_store.all())
+        info["projects"] = len(main.project_store.all())
+    else:
+        info = main.Snapshot(args.path).describe()
+    print(json.dumps(info, indent=2))
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    make = commands.add_parser("create", help="seed a dataset and write it to a snapshot")
+    make.add_argument("path")
+    make.add_argument("--users", type=int, default=10)
+    make.add_argument("--projects-per-user", type=int, default=2)
+    make.add_argument("--personas", type=int, default=5)
+    make.add_argument("--competitors", type=int, default=5)
+    make.add_argument("--topics", type=int, default=5)
+    make.add_argument("--observations", type=int, default=10,
+                      help="catalogue size stored in the snapshot (0 to skip)")
+    make.add_argument("--password", default="password")
+    make.add_argument("--no-series", dest="series", action="store_false",
+                      help="leave analytics series to be generated on demand")
+    make.set_defaults(run=create)
+
+    show = commands.add_parser("inspect", help="print a snapshot's sections")
+    show.add_argument("path")
+    show.add_argument("--load", action="store_true", help="also time a full load into the app")
+    show.set_defaults(run=inspect)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main_cli()